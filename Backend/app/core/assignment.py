@@ -0,0 +1,283 @@
+import random
+import re
+import threading
+from collections import defaultdict
+from ortools.sat.python import cp_model
+from app.core.solver import _ProgressCallback, _stop_on
+from app.utils.helper import parse_window
+import logging
+
+logger = logging.getLogger("facultyassignment")
+
+DEFAULT_MAX_UNITS = 24.0
+# Faculty considered per group; keeps the model linear in the number of groups
+MAX_CANDIDATES = 12
+
+
+def collect_groups(events):
+    """Course groups (courseCode, program, block) of the schedule with their timed sessions.
+
+    A group whose sessions all carry the same faculty is ``assigned`` to
+    them; mixed or partial assignments count as unassigned.
+    """
+    groups = {}
+    for ev in events:
+        if ev.get("start") is None or ev.get("end") is None:
+            continue
+        key = (ev["courseCode"], ev["program"], ev["block"])
+        group = groups.setdefault(key, {
+            "courseCode": ev["courseCode"],
+            "program": ev["program"],
+            "block": ev["block"],
+            "title": ev.get("title", ""),
+            "sessions": [],
+            "faculties": set(),
+        })
+        group["sessions"].append((ev["day"], ev["start"], ev["end"]))
+        group["faculties"].add(ev.get("faculty") or "")
+    result = []
+    for group in groups.values():
+        faculties = group.pop("faculties")
+        group["assigned"] = next(iter(faculties)) if len(faculties) == 1 else ""
+        result.append(group)
+    return result
+
+
+def _specialties(specialization):
+    return [s.strip().lower() for s in re.split(r"[,;/]", specialization or "") if s.strip()]
+
+
+def _matching(by_specialty, generalists, group):
+    """Faculty who may teach ``group``: those without a specialization, plus those
+    with an entry naming the course code or program or appearing in the title."""
+    code, program, title = group["courseCode"].lower(), group["program"].lower(), group["title"].lower()
+    matching = set(generalists)
+    for specialty, members in by_specialty.items():
+        if specialty in (code, program) or specialty in title:
+            matching.update(members)
+    return sorted(matching)
+
+
+def _cliques(groups):
+    """Maximal sets of groups with sessions overlapping at one instant, per day.
+
+    Any two groups in a set clash, so a teacher takes at most one of them;
+    in an interval graph these sets cover every pairwise clash.
+    """
+    by_day = defaultdict(list)
+    for g, group in enumerate(groups):
+        for day, start, end in group["sessions"]:
+            by_day[day].append((start, 1, g))
+            by_day[day].append((end, 0, g))
+    cliques = set()
+    for points in by_day.values():
+        points.sort()
+        active = defaultdict(int)
+        grew = False
+        for _, opening, g in points:
+            if opening:
+                active[g] += 1
+                grew = True
+                continue
+            if grew and len(active) > 1:
+                cliques.add(frozenset(active))
+            grew = False
+            active[g] -= 1
+            if not active[g]:
+                del active[g]
+    return cliques
+
+
+def _greedy(groups, eligible, minutes, load, capacity, busy, preferred):
+    """Largest groups first, each to its ``preferred`` teacher or else the least-loaded
+    eligible one that is free; the solver's hint and its fallback answer."""
+    load = dict(load)
+    busy = defaultdict(list, {f: list(sessions) for f, sessions in busy.items()})
+    chosen = {}
+    for g in sorted(eligible, key=lambda g: -minutes[g]):
+        sessions = groups[g]["sessions"]
+        for f in sorted(eligible[g], key=lambda f: (f != preferred.get(g), load[f])):
+            if load[f] + minutes[g] > capacity[f]:
+                continue
+            if any(d == bd and s < be and bs < e for d, s, e in sessions for bd, bs, be in busy[f]):
+                continue
+            chosen[g] = f
+            load[f] += minutes[g]
+            busy[f].extend(sessions)
+            break
+    return chosen
+
+
+def solve_assignment(groups, faculty, keep_existing=True, default_max_units=DEFAULT_MAX_UNITS,
+                     max_time=5, num_workers=8, report=None, stop_event=None):
+    """Assign one faculty member to each course group with CP-SAT.
+
+    ``groups`` come from ``collect_groups``; ``faculty`` are faculty
+    documents, whose ``max_units`` (contact hours per week, like ``units``)
+    defaults to ``default_max_units``. A teacher never gets two groups with
+    overlapping sessions or sessions in their ``unavailable`` windows, never
+    exceeds their maximum load and only takes groups matching their
+    specialization. With ``keep_existing`` current
+    assignments are locked in; otherwise they only seed the search.
+
+    The objective assigns as many groups as possible, then minimizes the
+    heaviest load of the faculty who can still take groups. Returns ``{"assignments", "unassigned", "loads",
+    "status"}``, or None if stopped. If the time runs out before CP-SAT finds
+    a solution, the greedy hint is returned with status "GREEDY".
+    """
+    report = report or (lambda value, stats=None: None)
+    index = {f["name"]: i for i, f in enumerate(faculty)}
+    capacity = [round(60 * (f.get("max_units") or default_max_units)) for f in faculty]
+    minutes = [sum(end - start for _, start, end in group["sessions"]) for group in groups]
+    specialties = [_specialties(f.get("specialization")) for f in faculty]
+    generalists = [f for f, specialty in enumerate(specialties) if not specialty]
+    windows = [[parse_window(w) for w in f.get("unavailable") or ()] for f in faculty]
+    by_specialty = defaultdict(list)
+    for f, specialty in enumerate(specialties):
+        for s in specialty:
+            by_specialty[s].append(f)
+
+    locked = {}
+    locked_load = defaultdict(int)
+    for g, group in enumerate(groups):
+        f = index.get(group["assigned"])
+        if keep_existing and f is not None:
+            locked[g] = f
+            locked_load[f] += minutes[g]
+    report(10)
+
+    # Groups clashing with a teacher's locked groups are off limits for them
+    cliques = _cliques(groups)
+    blocked = defaultdict(set)
+    for clique in cliques:
+        owners = {locked[g] for g in clique if g in locked}
+        for f in owners:
+            blocked[f] |= clique
+    report(20)
+
+    eligible = {}
+    unassigned = []
+    for g, group in enumerate(groups):
+        if g in locked:
+            continue
+        matching = _matching(by_specialty, generalists, group)
+        if not matching:
+            unassigned.append((g, "no faculty with a matching specialization"))
+            continue
+        free = [f for f in matching if g not in blocked[f] and locked_load[f] + minutes[g] <= capacity[f]
+                and not any(d == wd and s < we and ws < e
+                            for d, s, e in group["sessions"] for wd, ws, we in windows[f])]
+        if not free:
+            unassigned.append((g, "every matching faculty member is busy, unavailable or at full load"))
+            continue
+        eligible[g] = free
+
+    busy = defaultdict(list)
+    for g, f in locked.items():
+        busy[f].extend(groups[g]["sessions"])
+    preferred = {} if keep_existing else {g: index.get(groups[g]["assigned"]) for g in eligible}
+    greedy = _greedy(groups, eligible, minutes, locked_load, capacity, busy, preferred)
+    report(30)
+
+    # The model only gets MAX_CANDIDATES teachers per group: the greedy pick,
+    # the current teacher, specialists, then a random sample that spreads the rest
+    model = cp_model.CpModel()
+    x = {}
+    candidates = {}
+    for g, free in eligible.items():
+        head = dict.fromkeys(f for f in (greedy.get(g), preferred.get(g)) if f is not None)
+        rng = random.Random(g)
+        for tier in ([f for f in free if specialties[f]], [f for f in free if not specialties[f]]):
+            tier = [f for f in tier if f not in head]
+            head.update(dict.fromkeys(rng.sample(tier, max(0, min(len(tier), MAX_CANDIDATES - len(head))))))
+        candidates[g] = list(head)
+        for f in candidates[g]:
+            x[g, f] = model.NewBoolVar(f"x_{g}_{f}")
+        model.AddAtMostOne(x[g, f] for f in candidates[g])
+    report(40)
+
+    by_faculty = defaultdict(dict)
+    for (g, f), var in x.items():
+        by_faculty[f][g] = var
+    for clique in cliques:
+        lits = defaultdict(list)
+        for g in clique:
+            for f in candidates.get(g, ()):
+                lits[f].append(x[g, f])
+        for same_teacher in lits.values():
+            if len(same_teacher) > 1:
+                model.AddAtMostOne(same_teacher)
+    report(60)
+
+    # Kept groups may already put a teacher over their maximum; only loads the
+    # model can change are capped and balanced
+    max_load = model.NewIntVar(0, max(capacity, default=0), "max_load")
+    loads = {}
+    for f in range(len(faculty)):
+        terms = by_faculty[f]
+        load = locked_load[f] + sum(minutes[g] * var for g, var in terms.items())
+        if terms:
+            model.Add(load <= capacity[f])
+            model.Add(max_load >= load)
+        loads[f] = (load, terms)
+    weight = sum(minutes) + 1
+    model.Maximize(weight * sum(x.values()) - max_load)
+
+    for (g, f), var in x.items():
+        model.AddHint(var, greedy.get(g) == f)
+    greedy_loads = [locked_load[f] for f in range(len(faculty))]
+    for g, f in greedy.items():
+        greedy_loads[f] += minutes[g]
+    model.AddHint(max_load, max((greedy_loads[f] for f in by_faculty if by_faculty[f]), default=0))
+    report(80)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max_time
+    solver.parameters.num_search_workers = num_workers
+    # Probing and symmetry detection dominate presolve on these wide at-most-one
+    # models without helping the search much
+    solver.parameters.cp_model_probing_level = 0
+    solver.parameters.symmetry_level = 0
+    if stop_event is not None and stop_event.is_set():
+        return None
+    finished = threading.Event()
+    if stop_event is not None:
+        threading.Thread(target=_stop_on, args=(stop_event, finished, solver), daemon=True).start()
+    try:
+        status = solver.Solve(model, _ProgressCallback(report, True))
+    finally:
+        finished.set()
+    report(95, {
+        "status": solver.StatusName(status),
+        "objective": solver.ObjectiveValue(),
+        "bound": solver.BestObjectiveBound(),
+        "wall_time": round(solver.WallTime(), 3),
+    })
+    if stop_event is not None and stop_event.is_set():
+        return None
+    chosen = dict(locked)
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        chosen.update((g, f) for (g, f), var in x.items() if solver.Value(var))
+        final_loads = {f: round(solver.Value(load) / 60, 2) if terms else round(load / 60, 2)
+                       for f, (load, terms) in loads.items()}
+        status = solver.StatusName(status)
+    else:
+        # Out of time before the first solution: the greedy hint is still valid
+        logger.info("Solver found no assignment (%s), using the greedy one", solver.StatusName(status))
+        chosen.update(greedy)
+        final_loads = {f: round(load / 60, 2) for f, load in enumerate(greedy_loads)}
+        status = "GREEDY"
+    for g in candidates:
+        if g not in chosen:
+            unassigned.append((g, "no conflict-free assignment within the load limits"))
+
+    def ref(g):
+        return {key: groups[g][key] for key in ("courseCode", "program", "block")}
+
+    return {
+        "status": status,
+        "assignments": [{**ref(g), "faculty": faculty[f]["name"], "locked": g in locked}
+                        for g, f in sorted(chosen.items())],
+        "unassigned": [{**ref(g), "reason": reason} for g, reason in sorted(unassigned)],
+        "loads": {faculty[f]["name"]: load for f, load in final_loads.items()},
+    }
@@ -1,4 +1,14 @@
+import asyncio
+import functools
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
 import jwt
+from cachetools import TLRUCache
 from datetime import datetime, timedelta
 from fastapi import HTTPException, Header
 from app.core.firebase import verify_admin_email
@@ -6,6 +16,17 @@ from app.core.firebase import verify_admin_email
 SECRET_KEY = "SAAMDEVELOOPERS"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 180
+TOKEN_CACHE_SIZE = 4096
+
+# Verified payloads by token hash; each entry expires at the token's own exp
+_token_cache = TLRUCache(maxsize=TOKEN_CACHE_SIZE, ttu=lambda key, payload, now: payload["exp"], timer=time.time)
+_token_lock = threading.Lock()
+
+BCRYPT_ROUNDS = 12
+HASH_THREADS = min(4, os.cpu_count() or 1)
+
+# bcrypt is deliberately slow; a small dedicated pool caps the CPU logins can take
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_THREADS, thread_name_prefix="bcrypt")
 
 
 def create_access_token(data: dict) -> str:
@@ -16,17 +37,60 @@ def create_access_token(data: dict) -> str:
     return encoded_jwt
 
 
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(BCRYPT_ROUNDS)).decode()
+
+
+@functools.lru_cache(maxsize=1)
+def _dummy_hash() -> bytes:
+    return hash_password("unused").encode()
+
+
+def _check_password(password: str, stored) -> tuple[bool, bool]:
+    if not stored:
+        # Unknown account: spend the same time as a real check
+        bcrypt.checkpw(password.encode(), _dummy_hash())
+        return False, False
+    if stored.startswith(("$2a$", "$2b$", "$2y$")):
+        try:
+            return bcrypt.checkpw(password.encode(), stored.encode()), False
+        except ValueError:
+            return False, False
+    # Legacy plaintext password: accept once, then the caller rehashes it
+    ok = hmac.compare_digest(password.encode(), stored.encode())
+    return ok, ok
+
+
+async def verify_password(password: str, stored) -> tuple[bool, bool]:
+    """Check a password off the event loop; returns (ok, needs_rehash)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _check_password, password, stored)
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, hash_password, password)
+
+
 def verify_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).digest()
+    with _token_lock:
+        payload = _token_cache.get(key)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.PyJWTError as e:
         raise HTTPException(status_code=401, detail=f"Token error: {str(e)}")
+    if "exp" in payload:
+        with _token_lock:
+            _token_cache[key] = payload
+    return payload
 
 
-def verify_token_allowed(authorization: str = Header(...)) -> dict:
+async def verify_token_allowed(authorization: str = Header(...)) -> dict:
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header missing")
 
@@ -0,0 +1,93 @@
+from collections import defaultdict
+from app.core.timegrid import TimeGrid, session_plan
+from app.core.rooms import block_enrollment, by_capacity, smallest_fit
+
+
+class InfeasibleSchedule(Exception):
+    """No schedule exists for the catalog; ``problems`` says why."""
+
+    def __init__(self, problems):
+        super().__init__(problems)
+        self.problems = problems
+
+
+def _packable(lengths, capacity):
+    """Most slots of a ``capacity``-slot day that sessions of these lengths can fill."""
+    reachable = [True] + [False] * capacity
+    for total in range(1, capacity + 1):
+        reachable[total] = any(length <= total and reachable[total - length] for length in lengths)
+    return max(total for total in range(capacity + 1) if reachable[total])
+
+
+def _problem(check, scope, demand, available, codes, grid):
+    return {
+        "check": check,
+        "scope": scope,
+        "demand_minutes": demand * grid.slot_minutes,
+        "available_minutes": available * grid.slot_minutes,
+        "courses": sorted(codes),
+    }
+
+
+def check_capacity(courses, rooms, time_settings, days, slot_minutes=None):
+    """Necessary conditions for a timetable, checked in milliseconds before any model is built.
+
+    Compares slot demand against the time grid: each session must fit in a
+    day, a course whose sessions go on distinct days (the solver's
+    AddAllDifferent) needs that many days on which its longest session
+    fits a room, and each room type (each room's free slots per day, after
+    its unavailability) and section (program, year, block) must have room
+    for its sessions, counting per day only the slots their lengths can
+    fill. Rooms are checked once per enrollment size, against the blocks at
+    least that large and the rooms that seat them. Returns problems as dicts with demand and availability in
+    minutes; an empty list is not a guarantee.
+    """
+    grid = TimeGrid.from_settings(time_settings, len(days), slot_minutes)
+    per_day = grid.slots_per_day
+    rooms = by_capacity(rooms)
+    unavailable = rooms.get("unavailable") or {}
+    room_blocked = {sess_type: [grid.blocked(unavailable.get(name, ()), days) for name in rooms.get(sess_type, ())]
+                    for sess_type in ("lecture", "lab")}
+    problems = []
+    room_demand = defaultdict(list)
+    sections = defaultdict(list)
+    for course in courses:
+        code, blocks = course["courseCode"], course.get("blocks", 1)
+        plan = [(sess_type, units, grid.length(minutes))
+                for sess_type, units, minutes in session_plan(course, time_settings) if units > 0]
+        for sess_type, units, length in plan:
+            if length > per_day:
+                problems.append(_problem("session", f"{code} {sess_type}", length, per_day, [code], grid))
+            for b in range(blocks):
+                blk = chr(ord('A') + b)
+                room_demand[sess_type].append((block_enrollment(course, blk) or 0, units * length, length, code))
+                sections[(course["program"], course["yearLevel"], blk)].append((code, units, length))
+        sessions = sum(units for _, units, _ in plan) * blocks
+        longest, longest_type = max(((length, sess_type) for sess_type, _, length in plan), default=(0, None))
+        if plan and sessions <= len(days) and longest <= per_day and room_blocked[longest_type]:
+            usable = sum(1 for d in range(len(days))
+                         if any(grid.fits(longest, d, spans) for spans in room_blocked[longest_type]))
+            if sessions > usable:
+                problems.append(_problem("days", code, sessions * longest, usable * longest, [code], grid))
+
+    for sess_type, items in room_demand.items():
+        # Report only the smallest enrollment size that does not fit
+        for size in sorted({size for size, *_ in items}):
+            larger = [item for item in items if item[0] >= size]
+            demand = sum(slots for _, slots, _, _ in larger)
+            lengths = {length for _, _, length, _ in larger}
+            available = sum(_packable(lengths, grid.free_slots(d, spans))
+                            for spans in room_blocked[sess_type][smallest_fit(rooms, sess_type, size):]
+                            for d in range(len(days)))
+            if demand > available:
+                scope = f"{sess_type} rooms seating {size}+" if size else f"{sess_type} rooms"
+                problems.append(_problem("rooms", scope, demand, available, {code for *_, code in larger}, grid))
+                break
+
+    for (prog, yr, blk), items in sections.items():
+        demand = sum(units * length for _, units, length in items)
+        available = len(days) * _packable({length for _, _, length in items}, per_day)
+        if demand > available:
+            problems.append(_problem("section", f"{prog} year {yr} block {blk}", demand, available,
+                                     {code for code, _, _ in items}, grid))
+    return problems
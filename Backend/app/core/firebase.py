@@ -1,138 +1,276 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import firebase_admin
 from firebase_admin import credentials, firestore
-from app.core.globals import schedule_dict, in_memory_faculty_loads
 
 cred = credentials.Certificate("optisched-6b881-firebase-adminsdk-fbsvc-61c4234df0.json")
 firebase_admin.initialize_app(cred)
 db = firestore.client()
 
-_courses_cache = None
-_rooms_cache = None
-_time_settings_cache = None
-_days_cache = None
-_faculty_cache = None
-_admins_cache: set[str] = set()
-
-
-def get_start_end(period_str: str):
-    def parse_time(t: str) -> int:
-        time_part, meridiem = t.split(" ")
-        hour, minute = map(int, time_part.split("." if ":" not in time_part else ":"))
-        if meridiem.upper() == "PM" and hour != 12:
-            hour += 12
-        if meridiem.upper() == "AM" and hour == 12:
-            hour = 0
-        return hour * 60 + minute
-
-    start_str, end_str = period_str.split(" - ")
-    return parse_time(start_str), parse_time(end_str)
-
-
-def recalc_units_in_memory():
-    global in_memory_faculty_loads
-    in_memory_faculty_loads = {}
-    batch = db.batch()
-    faculty_ref = db.collection("faculty")
-    faculty_docs = {doc.id: doc for doc in faculty_ref.stream()}
-
-    for event in schedule_dict.values():
-        if not event.get("faculty") or not event.get("period"):
-            continue
-        try:
-            start, end = get_start_end(event["period"])
-            duration = (end - start) / 60.0
-            in_memory_faculty_loads[event["faculty"]] = in_memory_faculty_loads.get(event["faculty"], 0) + duration
-        except Exception as e:
-            print(f"Calculation error: {str(e)}")
-
-    update_count = 0
-    for doc_id, doc in faculty_docs.items():
-        faculty_name = doc.to_dict().get("name")
-        new_units = in_memory_faculty_loads.get(faculty_name, 0)
-        if doc.to_dict().get("units", 0) != new_units:
-            batch.update(faculty_ref.document(doc_id), {"units": new_units})
-            update_count += 1
-
-    if update_count > 0:
+CACHE_WARMUP_TIMEOUT = 10
+DB_THREADS = 16
+MAX_CONCURRENT_DB_CALLS = 64
+BATCH_WRITE_LIMIT = 500
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="firestore")
+_db_slots = asyncio.Semaphore(MAX_CONCURRENT_DB_CALLS)
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking Firestore call on the bounded Firestore thread pool.
+
+    Async route handlers must await this instead of calling the sync client
+    directly, so a slow round-trip never stalls the event loop. At most
+    MAX_CONCURRENT_DB_CALLS calls are in flight; further callers wait.
+    """
+    async with _db_slots:
+        return await asyncio.get_running_loop().run_in_executor(
+            _db_executor, functools.partial(fn, *args, **kwargs)
+        )
+
+
+async def commit_batched(writes):
+    """Commit ``(method, ref, *args)`` writes, e.g. ``("set", ref, data)``.
+
+    An entry may also be a list of such writes that must land in the same
+    batch. Writes are split into WriteBatches of at most BATCH_WRITE_LIMIT,
+    which are committed concurrently. Each batch is atomic; the whole call
+    is not.
+    """
+    chunks, chunk = [], []
+    for entry in writes:
+        group = entry if isinstance(entry, list) else [entry]
+        if len(chunk) + len(group) > BATCH_WRITE_LIMIT:
+            chunks.append(chunk)
+            chunk = []
+        chunk.extend(group)
+    if chunk:
+        chunks.append(chunk)
+
+    def commit(chunk):
+        batch = db.batch()
+        for method, ref, *args in chunk:
+            getattr(batch, method)(ref, *args)
         batch.commit()
-        print(f"Batched {update_count} faculty updates")
+
+    await asyncio.gather(*(run_db(commit, chunk) for chunk in chunks))
+
+
+async def get_docs(refs):
+    """Fetch documents with batched get_all calls; returns ``{doc_id: data or None}``."""
+    def fetch(chunk):
+        return {snap.id: snap.to_dict() if snap.exists else None for snap in db.get_all(chunk)}
+
+    docs = {}
+    for part in await asyncio.gather(*(
+        run_db(fetch, refs[i:i + BATCH_WRITE_LIMIT]) for i in range(0, len(refs), BATCH_WRITE_LIMIT)
+    )):
+        docs.update(part)
+    return docs
+
+
+class _SnapshotCache:
+    """In-memory mirror of Firestore data kept current by an on_snapshot listener.
+
+    Listener callbacks and local write-throughs apply changes document by
+    document and bump ``version``; reads never touch the network once the
+    first snapshot has arrived. If it does not arrive within
+    CACHE_WARMUP_TIMEOUT, the data is fetched once directly instead.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._docs = {}
+        self._lock = threading.Lock()
+        self._watch_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._watch = None
+
+    def start(self):
+        with self._watch_lock:
+            if self._watch is None:
+                self._watch = self._ref().on_snapshot(self._on_snapshot)
+
+    def stop(self):
+        with self._watch_lock:
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
+
+    def _on_snapshot(self, snapshots, changes, read_time):
+        with self._lock:
+            for change in changes:
+                if change.type.name == "REMOVED":
+                    self._docs.pop(change.document.id, None)
+                else:
+                    self._docs[change.document.id] = change.document.to_dict()
+            self._changed()
+        self._ready.set()
+
+    def _changed(self):
+        self.version += 1
+
+    def _warm(self):
+        if self._ready.is_set():
+            return
+        self.start()
+        if not self._ready.wait(CACHE_WARMUP_TIMEOUT):
+            docs = self._fetch()
+            with self._lock:
+                if not self._ready.is_set():
+                    self._docs = docs
+                    self._changed()
+                    self._ready.set()
+
+    def put(self, doc_id, data):
+        with self._lock:
+            self._docs[doc_id] = data
+            self._changed()
+
+    def put_many(self, docs):
+        """Apply several ``{doc_id: data}`` writes as one cache change."""
+        with self._lock:
+            self._docs.update(docs)
+            self._changed()
+
+    def delete(self, doc_id):
+        with self._lock:
+            self._docs.pop(doc_id, None)
+            self._changed()
+
+    def delete_many(self, doc_ids):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._docs.pop(doc_id, None)
+            self._changed()
+
+    def get(self, doc_id):
+        self._warm()
+        return self._docs.get(doc_id)
+
+
+class CollectionCache(_SnapshotCache):
+    def __init__(self, collection):
+        super().__init__()
+        self.collection = collection
+        self._values = None
+
+    def _ref(self):
+        return db.collection(self.collection)
+
+    def _fetch(self):
+        return {doc.id: doc.to_dict() for doc in self._ref().stream()}
+
+    def _changed(self):
+        super()._changed()
+        self._values = None
+
+    def items(self):
+        self._warm()
+        with self._lock:
+            return list(self._docs.items())
+
+    def values(self):
+        """All documents as a list, rebuilt only after a change."""
+        self._warm()
+        with self._lock:
+            if self._values is None:
+                self._values = list(self._docs.values())
+            return self._values
+
+
+class DocumentCache(_SnapshotCache):
+    def __init__(self, collection, document):
+        super().__init__()
+        self.collection = collection
+        self.document = document
+
+    def _ref(self):
+        return db.collection(self.collection).document(self.document)
+
+    def _fetch(self):
+        doc = self._ref().get()
+        return {doc.id: doc.to_dict()} if doc.exists else {}
+
+    def data(self):
+        """The document's fields, or None if it does not exist."""
+        return self.get(self.document)
+
+    def set(self, data):
+        self.put(self.document, data)
+
+
+courses_cache = CollectionCache("courses")
+faculty_cache = CollectionCache("faculty")
+rooms_cache = DocumentCache("rooms", "rooms")
+time_settings_cache = DocumentCache("settings", "time")
+days_cache = DocumentCache("settings", "days")
+admins_cache = CollectionCache("admins")
+_caches = (courses_cache, faculty_cache, rooms_cache, time_settings_cache, days_cache, admins_cache)
+_admin_index = (None, {})
 
 
 def get_faculty():
-    global _faculty_cache
-    if _faculty_cache is None:
-        faculty_ref = db.collection("faculty")
-        docs = faculty_ref.stream()
-        _faculty_cache = [doc.to_dict() for doc in docs]
-    return _faculty_cache
+    return faculty_cache.values()
+
+
+def faculty_unavailable():
+    """Unavailability windows by faculty name, for faculty that have any."""
+    return {f["name"]: f["unavailable"] for f in faculty_cache.values() if f.get("unavailable")}
 
 
 def load_courses():
-    global _courses_cache
-    if _courses_cache is None:
-        courses_ref = db.collection("courses")
-        docs = courses_ref.stream()
-        _courses_cache = [doc.to_dict() for doc in docs]
-    return _courses_cache
+    return courses_cache.values()
 
 
 def load_rooms():
-    global _rooms_cache
-    if _rooms_cache is None:
-        rooms_ref = db.collection("rooms").document("rooms")
-        doc = rooms_ref.get()
-        _rooms_cache = doc.to_dict() if doc.exists else {"lecture": [], "lab": []}
-    return _rooms_cache
+    return rooms_cache.data() or {"lecture": [], "lab": []}
 
 
 def load_time_settings():
-    global _time_settings_cache
-    if _time_settings_cache is None:
-        time_ref = db.collection("settings").document("time")
-        doc = time_ref.get()
-        _time_settings_cache = doc.to_dict() if doc.exists else {"start_time": 7, "end_time": 21}
-    return _time_settings_cache
+    return time_settings_cache.data() or {"start_time": 7, "end_time": 21}
 
 
 def load_days():
-    global _days_cache
-    if _days_cache is None:
-        days_ref = db.collection("settings").document("days")
-        doc = days_ref.get()
-        _days_cache = doc.to_dict().get("days", []) if doc.exists else []
-    return _days_cache
-
-
-def refresh_faculty_cache():
-    global _faculty_cache
-    _faculty_cache = None
-
-
-def refresh_courses_cache():
-    global _courses_cache
-    _courses_cache = None
+    days = days_cache.data()
+    return days.get("days", []) if days else []
 
 
-def refresh_rooms_cache():
-    global _rooms_cache
-    _rooms_cache = None
+def start_cache_listeners():
+    """Attach every listener and block until each cache is warm."""
+    for cache in _caches:
+        cache.start()
+    for cache in _caches:
+        cache._warm()
 
 
-def refresh_time_settings_cache():
-    global _time_settings_cache
-    _time_settings_cache = None
+def stop_cache_listeners():
+    for cache in _caches:
+        cache.stop()
 
 
-def refresh_days_cache():
-    global _days_cache
-    _days_cache = None
+def cache_versions():
+    return {
+        "courses": courses_cache.version,
+        "faculty": faculty_cache.version,
+        "rooms": rooms_cache.version,
+        "time_settings": time_settings_cache.version,
+        "days": days_cache.version,
+    }
 
 
-def load_admins_cache():
-    global _admins_cache
-    docs = db.collection("admins").stream()
-    _admins_cache = {d.to_dict().get("email") for d in docs}
+def admin_index():
+    """(doc_id, admin) by email, rebuilt whenever the admins listener reports a change."""
+    global _admin_index
+    version, index = _admin_index
+    if version != admins_cache.version:
+        version = admins_cache.version
+        index = {admin.get("email"): (doc_id, admin) for doc_id, admin in admins_cache.items()}
+        _admin_index = (version, index)
+    return index
 
 
 def verify_admin_email(email: str) -> bool:
-    return email in _admins_cache
+    return email in admin_index()
@@ -1,3 +1,4 @@
-schedule_dict = {}
-in_memory_faculty_loads = {}
+from app.core.store import ScheduleStore
+
+schedule_store = ScheduleStore()
 progress_state = {}
\ No newline at end of file
@@ -0,0 +1,350 @@
+import asyncio
+import functools
+import itertools
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from app.core.globals import schedule_store, progress_state
+from app.core.progress import publish, solver_stats
+from app.core.firebase import load_courses, load_rooms, load_time_settings, load_days, get_faculty, faculty_unavailable
+from app.core.solver import solve_schedule, report_to_queue, solution_to_queue, ScheduleTimeout
+from app.core.feasibility import InfeasibleSchedule
+from app.core.assignment import solve_assignment, collect_groups
+import logging
+
+logger = logging.getLogger("jobs")
+
+MAX_WORKERS = 2
+MAX_PENDING = 8
+MAX_FINISHED_KEPT = 50
+
+_pool = None
+_manager = None
+_progress_queue = None
+_jobs = {}
+_inflight = {}
+_submit_seq = itertools.count(1)
+_applied_seq = 0
+_lock = threading.Lock()
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobSuperseded(Exception):
+    """A finished job's result would overwrite a newer schedule."""
+
+
+def _drain_progress(queue):
+    while True:
+        item = queue.get()
+        if item is None:
+            return
+        job_id, value, stats, best = item
+        job = _jobs.get(job_id)
+        if best is not None:
+            # Improving solution of an optimizing job, kept until it is accepted or done
+            if job and job["status"] in ("queued", "running"):
+                job["best"] = best
+                job["best_at"] = solver_stats.get(job_id)
+            continue
+        if job and job["status"] in ("queued", "running"):
+            if job["status"] == "queued":
+                job["done"].get_loop().call_soon_threadsafe(_mark_running, job_id)
+            publish(job_id, value, stats)
+        elif job and stats is not None:
+            # Final solver stats may arrive after the job has been finished
+            solver_stats[job_id] = stats
+
+
+def _mark_running(job_id):
+    """Runs on the event loop, so it never overwrites a status set there (e.g. by cancel_job)."""
+    job = _jobs.get(job_id)
+    if job and job["status"] == "queued":
+        job["status"] = "running"
+
+
+def _ensure_started():
+    global _pool, _manager, _progress_queue
+    with _lock:
+        if _pool is None:
+            ctx = multiprocessing.get_context("spawn")
+            _manager = ctx.Manager()
+            _progress_queue = _manager.Queue()
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=ctx)
+            threading.Thread(target=_drain_progress, args=(_progress_queue,), daemon=True).start()
+
+
+def _dedup_key(options):
+    def hashable(v):
+        if isinstance(v, dict):
+            return tuple(sorted(v.items()))
+        return tuple(sorted(v)) if isinstance(v, (set, list, tuple)) else v
+    return tuple(sorted((k, hashable(v)) for k, v in options.items()))
+
+
+def _prune_finished():
+    finished = [jid for jid, job in _jobs.items() if job["status"] not in ("queued", "running")]
+    for jid in finished[:-MAX_FINISHED_KEPT]:
+        _jobs.pop(jid, None)
+
+
+def _submit(kind, options, fn, *args, apply, stream=False, snapshot=None, **kwargs):
+    """Queue ``fn(*args, **kwargs, report=..., stop_event=...)`` in the worker pool.
+
+    ``apply(job, result)`` runs on the event loop once the worker returns a
+    result and may replace it with what was actually applied, or raise
+    JobSuperseded to drop it. With ``stream`` the worker also gets an
+    ``on_solution`` callback whose latest result is kept as the job's
+    ``best``. ``snapshot`` is kept on the job for ``apply``.
+    """
+    loop = asyncio.get_running_loop()
+    key = (kind, _dedup_key(options))
+    if key in _inflight:
+        return _jobs[_inflight[key]]
+    pending = sum(1 for job in _jobs.values() if job["status"] in ("queued", "running"))
+    if pending >= MAX_PENDING:
+        raise JobQueueFull(f"{pending} schedule jobs already pending")
+
+    _ensure_started()
+    job_id = str(uuid.uuid4())
+    cancel = _manager.Event()
+    if stream:
+        kwargs["on_solution"] = functools.partial(solution_to_queue, _progress_queue, job_id)
+    future = _pool.submit(
+        fn, *args,
+        report=functools.partial(report_to_queue, _progress_queue, job_id),
+        stop_event=cancel, **kwargs
+    )
+    job = {
+        "id": job_id,
+        "kind": kind,
+        "key": key,
+        "seq": next(_submit_seq),
+        "status": "queued",
+        "cancel": cancel,
+        "future": future,
+        "apply": apply,
+        "result": None,
+        "best": None,
+        "problems": None,
+        "timed_out": False,
+        "snapshot": snapshot,
+        "done": loop.create_future(),
+    }
+    _jobs[job_id] = job
+    _inflight[key] = job_id
+    publish(job_id, 0)
+    future.add_done_callback(lambda f: loop.call_soon_threadsafe(_finish, job_id, f))
+    logger.info("Queued %s job %s", kind, job_id)
+    return job
+
+
+def submit_generation(**options):
+    """Queue a generation job in the worker pool and return its record.
+
+    ``options`` are passed to ``solve_schedule``. An identical request that
+    is still queued or running returns the existing job instead of a new one.
+    A re-solve (``changed_courses``) pins the events as they are now, so it
+    records the schedule version and is superseded by any edit made before
+    it finishes. Must be called from the event loop; raises JobQueueFull
+    when too many jobs are pending.
+    """
+    snapshot = None
+    if options.get("changed_courses") is not None:
+        snapshot = (schedule_store.epoch, schedule_store.version)
+    return _submit(
+        "schedule", options, solve_schedule, load_courses(), load_rooms(), load_time_settings(), load_days(),
+        current_events=list(schedule_store.values()), faculty_unavailable=faculty_unavailable(),
+        apply=_apply_schedule, stream=options.get("optimize", False), snapshot=snapshot, **options
+    )
+
+
+def submit_assignment(dry_run=False, **options):
+    """Queue a faculty auto-assignment over the current schedule; see ``solve_assignment``.
+
+    Unless ``dry_run``, the result is applied to the schedule when the job
+    finishes.
+    """
+    groups = collect_groups(schedule_store.values())
+    return _submit(
+        "assignment", dict(options, dry_run=dry_run), solve_assignment, groups, get_faculty(),
+        apply=(lambda job, result: result) if dry_run else _apply_assignment, **options
+    )
+
+
+def _apply_schedule(job, result):
+    global _applied_seq
+    # A job submitted before the last applied one must not overwrite it
+    if job["seq"] <= _applied_seq:
+        raise JobSuperseded("a newer schedule was applied first")
+    # Applying a re-solve would revert edits made to the events it pinned
+    if job["snapshot"] is not None and job["snapshot"] != (schedule_store.epoch, schedule_store.version):
+        raise JobSuperseded("the schedule changed while re-solving")
+    _applied_seq = job["seq"]
+    schedule_store.replace(result)
+    return result
+
+
+def _apply_assignment(job, result):
+    """Write the new faculty into the schedule, re-checking clashes against edits
+    made while the solver ran; groups that no longer fit move to ``unassigned``
+    and keep their previous faculty where it still fits."""
+    applied, unassigned = [], list(result["unassigned"])
+    changing = []
+    for assignment in result["assignments"]:
+        events = schedule_store.group(assignment["courseCode"], assignment["program"], assignment["block"])
+        if not events:
+            unassigned.append({**assignment, "reason": "group no longer in the schedule"})
+        elif any(ev.get("faculty") != assignment["faculty"] for ev in events):
+            changing.append((assignment, events))
+        else:
+            applied.append(assignment)
+
+    def clashes(events, faculty):
+        ids = {ev["schedule_id"] for ev in events}
+        return any(other["schedule_id"] not in ids
+                   for ev in events
+                   for other in schedule_store.faculty_overlaps(faculty, ev["day"], ev["start"], ev["end"]))
+
+    # Faculty are cleared first so groups can swap teachers without clashing with each other
+    for assignment, events in changing:
+        for ev in events:
+            if ev.get("faculty"):
+                schedule_store.update(ev["schedule_id"], {"faculty": ""})
+    rejected = []
+    for assignment, events in changing:
+        if clashes(events, assignment["faculty"]):
+            rejected.append((assignment, events))
+            continue
+        for ev in events:
+            schedule_store.update(ev["schedule_id"], {"faculty": assignment["faculty"]})
+        applied.append(assignment)
+    for assignment, events in rejected:
+        previous = {ev.get("faculty") for ev in events} - {None, ""}
+        if len(previous) == 1 and not clashes(events, next(iter(previous))):
+            for ev in events:
+                if ev.get("faculty"):
+                    schedule_store.update(ev["schedule_id"], {"faculty": ev["faculty"]})
+            unassigned.append({**assignment, "reason": "schedule changed while solving; kept the previous faculty"})
+        else:
+            unassigned.append({**assignment, "reason": "schedule changed while solving"})
+    for item in unassigned:
+        item.pop("faculty", None)
+        item.pop("locked", None)
+    logger.info("Applied %d faculty assignments, %d groups unassigned", len(applied), len(unassigned))
+    return {**result, "assignments": applied, "unassigned": unassigned}
+
+
+def _finish(job_id, future):
+    """Runs on the event loop: record the outcome and apply it."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return
+    if _inflight.get(job["key"]) == job_id:
+        del _inflight[job["key"]]
+    result = None
+    if not future.cancelled():
+        try:
+            result = future.result()
+        except InfeasibleSchedule as e:
+            job["problems"] = e.problems
+            logger.info("Schedule job %s is infeasible: %d problem(s)", job_id, len(e.problems))
+        except ScheduleTimeout as e:
+            job["timed_out"] = True
+            logger.info("Schedule job %s timed out: %s", job_id, e)
+        except Exception:
+            logger.exception("Schedule job %s crashed", job_id)
+
+    if job["status"] in ("accepted", "superseded"):
+        # accept_job settled this job already; the final solution is dropped
+        result = job["result"]
+    elif job["status"] == "cancelling" or future.cancelled():
+        job["status"] = "cancelled"
+        publish(job_id, -1)
+    elif result is None:
+        job["status"] = "timed_out" if job["timed_out"] else "failed"
+        publish(job_id, -1)
+    else:
+        try:
+            result = job["result"] = job["apply"](job, result)
+            job["status"] = "complete"
+            publish(job_id, 100)
+        except JobSuperseded as e:
+            logger.info("Dropped the result of job %s: %s", job_id, e)
+            result = None
+            job["status"] = "superseded"
+            publish(job_id, -1)
+    if not job["done"].done():
+        job["done"].set_result(result)
+    _prune_finished()
+
+
+def cancel_job(job_id):
+    """Cancel a queued job or stop the CP-SAT search of a running one."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return None
+    if job["status"] in ("queued", "running"):
+        if not job["future"].cancel():
+            job["cancel"].set()
+        job["status"] = "cancelling"
+    return job
+
+
+def accept_job(job_id):
+    """Apply an optimizing job's best solution so far and stop its search.
+
+    Returns the job, or None if it does not exist; a job that is not
+    running or has no solution yet is returned unchanged.
+    """
+    job = _jobs.get(job_id)
+    if job is None or job["status"] not in ("queued", "running") or job["best"] is None:
+        return job
+    if _inflight.get(job["key"]) == job_id:
+        del _inflight[job["key"]]
+    job["cancel"].set()
+    try:
+        job["result"] = job["apply"](job, job["best"])
+    except JobSuperseded as e:
+        logger.info("Dropped the best solution of job %s: %s", job_id, e)
+        job["status"] = "superseded"
+        publish(job_id, -1)
+        job["done"].set_result(None)
+        return job
+    job["status"] = "accepted"
+    publish(job_id, 100)
+    job["done"].set_result(job["result"])
+    logger.info("Accepted the best solution of job %s (%d events)", job_id, len(job["result"]))
+    return job
+
+
+def get_job(job_id):
+    return _jobs.get(job_id)
+
+
+def job_info(job):
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": progress_state.get(job["id"], 0),
+        "solver": solver_stats.get(job["id"]),
+        "best": None if job["best"] is None else {"event_count": len(job["best"]), "solver": job["best_at"]},
+        "problems": job["problems"],
+    }
+
+
+def shutdown():
+    global _pool, _manager
+    with _lock:
+        if _pool is not None:
+            for job in _jobs.values():
+                if job["status"] in ("queued", "running"):
+                    job["cancel"].set()
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _progress_queue.put(None)
+            _manager.shutdown()
+            _pool = _manager = None
@@ -0,0 +1,93 @@
+import asyncio
+from app.core.globals import schedule_store
+from app.core.firebase import db, faculty_cache, commit_batched
+import logging
+
+logger = logging.getLogger("loads")
+
+FLUSH_DELAY_SECONDS = 2.0
+
+_loop = None
+_timer = None
+_flushing = None
+_pending = False
+
+
+def _on_change(op, *args):
+    """Store listener: schedule a write-back on the event loop."""
+    global _pending
+    if _loop is not None and not _pending:
+        _pending = True
+        _loop.call_soon_threadsafe(_schedule)
+
+
+def _schedule():
+    # Changes within FLUSH_DELAY_SECONDS of the first one share a flush
+    global _timer
+    if _loop is None:
+        # Queued just before stop(), which flushes anyway
+        return
+    if _timer is None:
+        _timer = _loop.call_later(FLUSH_DELAY_SECONDS, _start_flush)
+
+
+def _start_flush():
+    global _timer, _flushing
+    _timer = None
+    if _flushing is None or _flushing.done():
+        _flushing = asyncio.ensure_future(flush())
+    else:
+        # Let the running flush finish, then pick up what changed meanwhile
+        _flushing.add_done_callback(lambda _: _schedule())
+
+
+def changed_units():
+    """Faculty whose stored ``units`` differ from their scheduled hours, as {doc_id: units}."""
+    loads = schedule_store.faculty_loads()
+    changed = {}
+    for doc_id, faculty in faculty_cache.items():
+        units = loads.get(faculty.get("name"), 0.0)
+        if faculty.get("units", 0) != units:
+            changed[doc_id] = units
+    return changed
+
+
+async def flush():
+    """Write the changed faculty ``units`` to Firestore in batches."""
+    global _pending
+    _pending = False
+    changed = changed_units()
+    if not changed:
+        return 0
+    faculty_ref = db.collection("faculty")
+    try:
+        await commit_batched([("update", faculty_ref.document(doc_id), {"units": units})
+                              for doc_id, units in changed.items()])
+    except Exception:
+        logger.exception("Faculty load write-back failed; retrying with the next change")
+        return 0
+    faculty_cache.put_many({doc_id: {**faculty_cache.get(doc_id), "units": units}
+                            for doc_id, units in changed.items() if faculty_cache.get(doc_id) is not None})
+    logger.info("Wrote units for %d faculty", len(changed))
+    return len(changed)
+
+
+def start():
+    """Track schedule changes and reconcile stored units once. Call from the event loop."""
+    global _loop
+    _loop = asyncio.get_running_loop()
+    schedule_store.subscribe(_on_change)
+    _on_change("start")
+
+
+async def stop():
+    """Cancel a pending write-back and flush right away."""
+    global _loop, _timer, _pending
+    if _timer is not None:
+        _timer.cancel()
+        _timer = None
+    if _flushing is not None and not _flushing.done():
+        await _flushing
+    _loop = None
+    _pending = False
+    await flush()
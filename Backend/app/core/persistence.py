@@ -0,0 +1,143 @@
+import asyncio
+import mmap
+import os
+import threading
+import msgpack
+import logging
+
+logger = logging.getLogger("persistence")
+
+SNAPSHOT_PATH = "schedule.snapshot"
+CHANGELOG_PATH = "schedule.changelog"
+SNAPSHOT_INTERVAL_SECONDS = 300
+FORMAT_VERSION = 2
+
+_store = None
+_log = None
+_seq = 0
+_snapshot_seq = 0
+_lock = threading.Lock()
+
+
+def _pack_snapshot(table, seq):
+    """The event table's raw column buffers and string tables, as msgpack."""
+    return msgpack.packb({"format": FORMAT_VERSION, "seq": seq, "table": table.to_state()})
+
+
+def _read_snapshot():
+    """Return (seq, table state), or (0, None) when there is no usable snapshot."""
+    if not os.path.exists(SNAPSHOT_PATH) or os.path.getsize(SNAPSHOT_PATH) == 0:
+        return 0, None
+    with open(SNAPSHOT_PATH, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        data = msgpack.unpackb(buf, strict_map_key=False)
+    if data.get("format") != FORMAT_VERSION:
+        logger.warning("Ignoring snapshot in unsupported format %s", data.get("format"))
+        return 0, None
+    return data["seq"], data["table"]
+
+
+def _read_log():
+    """Yield (seq, op, args) records; a torn trailing record is cut off the file,
+    so records appended after it stay readable."""
+    if not os.path.exists(CHANGELOG_PATH):
+        return
+    good = 0
+    with open(CHANGELOG_PATH, "rb") as f:
+        unpacker = msgpack.Unpacker(f, strict_map_key=False)
+        try:
+            for seq, op, args in unpacker:
+                good = unpacker.tell()
+                yield seq, op, args
+        except (ValueError, msgpack.UnpackException):
+            pass
+    if os.path.getsize(CHANGELOG_PATH) > good:
+        logger.warning("Truncating unreadable tail of %s at byte %d", CHANGELOG_PATH, good)
+        os.truncate(CHANGELOG_PATH, good)
+
+
+def _write_snapshot(table, seq):
+    """Atomically replace the snapshot, then drop the log entries it covers."""
+    global _snapshot_seq, _log
+    tmp = SNAPSHOT_PATH + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_pack_snapshot(table, seq))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, SNAPSHOT_PATH)
+    _snapshot_seq = seq
+    if _log is not None:
+        _log.close()
+    _log = open(CHANGELOG_PATH, "wb")
+
+
+def _on_change(op, *args):
+    """Store listener: snapshot on a full replace, append to the log otherwise."""
+    global _seq
+    with _lock:
+        _seq += 1
+        if op == "replace":
+            _write_snapshot(_store.table, _seq)
+            return
+        _log.write(msgpack.packb([_seq, op, list(args)]))
+        _log.flush()
+
+
+def restore(store):
+    """Load the snapshot and replay the change log into ``store``, then start logging.
+
+    Must run before anything else mutates the store. Returns the number of
+    events restored.
+    """
+    global _store, _seq, _snapshot_seq, _log
+    snapshot_seq, state = _read_snapshot()
+    if state is not None:
+        store.load_state(state)
+    last_seq, replayed = snapshot_seq, 0
+    for seq, op, args in _read_log():
+        if seq <= snapshot_seq:
+            continue
+        try:
+            if op == "add":
+                store.add(args[0])
+            elif op == "update":
+                store.update(args[0], args[1])
+            elif op == "remove":
+                store.remove(args[0])
+        except KeyError:
+            logger.warning("Skipping log record %d (%s) for a missing event", seq, op)
+        last_seq, replayed = seq, replayed + 1
+
+    with _lock:
+        _store = store
+        _seq, _snapshot_seq = last_seq, snapshot_seq
+        _log = open(CHANGELOG_PATH, "ab")
+    store.subscribe(_on_change)
+    logger.info("Restored %d events from snapshot and %d logged changes", len(store), replayed)
+    return len(store)
+
+
+def snapshot():
+    """Write a snapshot if anything was logged since the last one."""
+    if _store is None:
+        return
+    with _store._lock, _lock:
+        if _seq > _snapshot_seq:
+            _write_snapshot(_store.table, _seq)
+
+
+async def snapshot_periodically():
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(snapshot)
+        except Exception:
+            logger.exception("Periodic schedule snapshot failed")
+
+
+def close():
+    global _log
+    snapshot()
+    with _lock:
+        if _log is not None:
+            _log.close()
+            _log = None
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from app.core.globals import progress_state
+
+FINISHED_TTL_SECONDS = 300
+
+solver_stats = {}
+_subscribers = defaultdict(set)
+_finished_at = {}
+_lock = threading.Lock()
+
+
+def _evict_expired(now):
+    expired = [pid for pid, ts in _finished_at.items() if now - ts > FINISHED_TTL_SECONDS]
+    for pid in expired:
+        _finished_at.pop(pid, None)
+        progress_state.pop(pid, None)
+        solver_stats.pop(pid, None)
+
+
+def publish(process_id, value, stats=None):
+    """Record progress for a process and push it to every subscriber.
+
+    Safe to call from any thread. ``stats`` carries the solver's objective,
+    bound, wall time and solution count. Finished processes (100 or -1) are
+    kept for FINISHED_TTL_SECONDS so late /status calls still see them.
+    """
+    with _lock:
+        progress_state[process_id] = value
+        if stats is not None:
+            solver_stats[process_id] = stats
+        now = time.monotonic()
+        if value >= 100 or value == -1:
+            _finished_at[process_id] = now
+        _evict_expired(now)
+        subscribers = list(_subscribers.get(process_id, ()))
+    for loop, queue in subscribers:
+        loop.call_soon_threadsafe(queue.put_nowait, (value, stats))
+
+
+def subscribe(process_id):
+    """Return an asyncio queue receiving (progress, stats) updates for a process."""
+    queue = asyncio.Queue()
+    with _lock:
+        _subscribers[process_id].add((asyncio.get_running_loop(), queue))
+    return queue
+
+
+def unsubscribe(process_id, queue):
+    with _lock:
+        subs = _subscribers.get(process_id)
+        if subs is None:
+            return
+        subs.difference_update({entry for entry in subs if entry[1] is queue})
+        if not subs:
+            del _subscribers[process_id]
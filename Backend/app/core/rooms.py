@@ -0,0 +1,51 @@
+def block_enrollment(course, block):
+    """Students in one block of ``course``, or None when unknown.
+
+    ``blockEnrollment`` (by block letter) overrides the course's per-block
+    ``enrollment``; 0 counts as unknown.
+    """
+    return (course.get("blockEnrollment") or {}).get(block) or course.get("enrollment") or None
+
+
+def by_capacity(rooms):
+    """A copy of ``rooms`` with each room type ordered by capacity, smallest first.
+
+    Rooms without a capacity go last, in their original order, so the rooms
+    fitting any enrollment are always a suffix of the list.
+    """
+    capacity = rooms.get("capacity") or {}
+    ordered = dict(rooms)
+    for sess_type in ("lecture", "lab"):
+        ordered[sess_type] = sorted(rooms.get(sess_type, ()),
+                                    key=lambda name: (capacity.get(name) is None, capacity.get(name) or 0))
+    return ordered
+
+
+def smallest_fit(rooms, sess_type, size):
+    """Index of the first room of ``sess_type`` seating ``size`` in ``by_capacity`` order.
+
+    Every room from there on fits; ``len(rooms[sess_type])`` means none does.
+    """
+    names = rooms[sess_type]
+    if not size:
+        return 0
+    capacity = rooms.get("capacity") or {}
+    return next((r for r, name in enumerate(names) if capacity.get(name) is None or capacity[name] >= size),
+                len(names))
+
+
+def fits(rooms, room, size):
+    """Whether ``room`` seats ``size`` students; unknown sizes and capacities fit."""
+    seats = (rooms.get("capacity") or {}).get(room)
+    return not size or seats is None or seats >= size
+
+
+def seat_counts(rooms, sess_type):
+    """Seats of each room of ``sess_type`` in ``by_capacity`` order.
+
+    Rooms without a capacity count as the largest room of the type.
+    """
+    capacity = rooms.get("capacity") or {}
+    known = [capacity[name] for name in rooms[sess_type] if capacity.get(name) is not None]
+    return [capacity[name] if capacity.get(name) is not None else max(known, default=0)
+            for name in rooms[sess_type]]
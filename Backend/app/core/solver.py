@@ -0,0 +1,741 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ortools.sat.python import cp_model
+from app.core.timegrid import TimeGrid, session_plan
+from app.core.feasibility import InfeasibleSchedule, check_capacity
+from app.core.rooms import block_enrollment, by_capacity, seat_counts, smallest_fit
+from app.utils.helper import get_start_end, format_clock
+import logging
+
+logger = logging.getLogger("schedgeneration")
+
+# Soft-constraint weights for optimize=True, per slot of the time grid
+DEFAULT_WEIGHTS = {"gaps": 1, "late": 2, "day_balance": 1, "room_size": 1}
+DEFAULT_LATE_AFTER = 17
+# Least time between two improving solutions sent to ``on_solution``
+SOLUTION_INTERVAL_SECONDS = 1.0
+# Time for finding and shrinking the conflicting courses of an infeasible model
+EXPLAIN_MAX_TIME = 20
+
+
+class ScheduleTimeout(Exception):
+    """The search hit its time limit before finding a schedule or proving there is none."""
+
+def _index_events(events, days, rooms, grid):
+    """Map existing schedule events onto the slot grid, keyed by ckey.
+
+    Each ckey gets its sessions' (start slot, end slot, day index, room
+    index, event) sorted by start, matching the order imposed by the
+    symmetry breaking. Off-grid periods left by overrides are widened to
+    the slots they touch; rooms missing from the settings map to None.
+    """
+    slots = defaultdict(list)
+    for ev in events:
+        sess_type = 'lecture' if ev.get("session") == 'Lecture' else 'lab'
+        try:
+            day_idx = days.index(ev["day"])
+            start, end = (ev["start"], ev["end"]) if "start" in ev else get_start_end(ev["period"])
+        except (KeyError, ValueError):
+            continue
+        room_idx = rooms[sess_type].index(ev["room"]) if ev.get("room") in rooms[sess_type] else None
+        ckey = (ev["courseCode"], ev["program"], ev["year"], ev["block"], sess_type)
+        slots[ckey].append((grid.slot(day_idx, start), grid.slot_end(day_idx, end), day_idx, room_idx, ev))
+    for vals in slots.values():
+        vals.sort(key=lambda v: v[0])
+    return slots
+
+
+def _stop_on(stop_event, finished, solver):
+    """Stop ``solver`` once ``stop_event`` is set, unless it finishes first."""
+    while not finished.is_set():
+        if stop_event.wait(0.2):
+            solver.StopSearch()
+            return
+
+
+class _ProgressCallback(cp_model.CpSolverSolutionCallback):
+    """Reports objective, bound, wall time and solution count on each solution."""
+
+    def __init__(self, report, has_objective, on_solution=None):
+        super().__init__()
+        self._report = report
+        self._has_objective = has_objective
+        self._on_solution = on_solution
+        self._sent_at = None
+        self._solutions = 0
+
+    def on_solution_callback(self):
+        self._solutions += 1
+        self._report(95, {
+            "objective": self.ObjectiveValue() if self._has_objective else None,
+            "bound": self.BestObjectiveBound() if self._has_objective else None,
+            "wall_time": round(self.WallTime(), 3),
+            "solutions": self._solutions,
+        })
+        # Improving solutions of an optimization, throttled
+        now = time.monotonic()
+        if self._on_solution and (self._sent_at is None or now - self._sent_at >= SOLUTION_INTERVAL_SECONDS):
+            self._sent_at = now
+            self._on_solution(self)
+
+
+def _add_objective(model, sessions, grid, late_slot, weights, extra_seats):
+    """Minimize the weighted soft penalties, all counted in slots.
+
+    ``late``: slots a session runs past ``late_slot`` (slot of the day).
+    ``gaps``: idle slots between a section's first and last session of a day.
+    ``day_balance``: each section's busiest day, which spreads its sessions.
+    ``room_size``: slots times seats a session's room has beyond the smallest
+    room that seats its block, from ``extra_seats`` by session id (only when
+    rooms have capacities).
+    Pinned sessions of an incremental re-solve are not penalized.
+    """
+    inc_day = grid.slots_per_day
+    terms = []
+    by_section = defaultdict(list)
+    for sid, ckey, title, s, e, rv, dvar, dur, minutes, fit in sessions:
+        offset = s - dvar * inc_day
+        if weights.get("late") and 0 <= late_slot < inc_day:
+            late = model.NewIntVar(0, inc_day, f"late_{sid}")
+            model.Add(late >= offset + dur - late_slot)
+            terms.append(weights["late"] * late)
+        if weights.get("room_size") and sid in extra_seats:
+            terms.append(weights["room_size"] * dur * extra_seats[sid])
+        by_section[ckey[1:4]].append((sid, offset, dvar, dur))
+
+    if not (weights.get("gaps") or weights.get("day_balance")):
+        model.Minimize(sum(terms))
+        return
+    for (prog, yr, blk), items in by_section.items():
+        heaviest = model.NewIntVar(0, inc_day, f"heaviest_{prog}_{yr}_{blk}")
+        for d in range(grid.n_days):
+            present = []
+            for sid, offset, dvar, dur in items:
+                lit = model.NewBoolVar(f"on_{sid}_{d}")
+                model.Add(dvar == d).OnlyEnforceIf(lit)
+                model.Add(dvar != d).OnlyEnforceIf(lit.Not())
+                present.append((lit, offset, dur))
+            busy = sum(dur * lit for lit, _, dur in present)
+            model.Add(heaviest >= busy)
+            if weights.get("gaps") and len(present) > 1:
+                first = model.NewIntVar(0, inc_day, f"first_{prog}_{yr}_{blk}_{d}")
+                last = model.NewIntVar(0, inc_day, f"last_{prog}_{yr}_{blk}_{d}")
+                for lit, offset, dur in present:
+                    model.Add(first <= offset).OnlyEnforceIf(lit)
+                    model.Add(last >= offset + dur).OnlyEnforceIf(lit)
+                gap = model.NewIntVar(0, inc_day, f"gap_{prog}_{yr}_{blk}_{d}")
+                model.Add(gap >= last - first - busy)
+                terms.append(weights["gaps"] * gap)
+        if weights.get("day_balance"):
+            terms.append(weights["day_balance"] * heaviest)
+    model.Minimize(sum(terms))
+
+
+def _smaller_rooms(value, sessions, room_blocked, pinned_rooms, inc_day):
+    """Move each course group, largest rooms first, to the smallest room that seats
+    it and is free at all of its sessions; returns the new room index by ckey."""
+    busy = defaultdict(list)
+    for sess_type, blocked in room_blocked.items():
+        for r, spans in enumerate(blocked):
+            for lo, hi in spans:
+                busy[(sess_type, r, lo // inc_day)].append((lo, hi))
+    for sess_type, r, lo, hi in pinned_rooms:
+        busy[(sess_type, r, lo // inc_day)].append((lo, hi))
+    groups = {}
+    for sid, ckey, title, s, e, rv, dvar, dur, minutes, fit in sessions:
+        room, start = value(rv), value(s)
+        groups.setdefault(ckey, (room, fit, []))[2].append((start, start + dur))
+        busy[(ckey[4], room, start // inc_day)].append((start, start + dur))
+
+    moved = {}
+    for ckey, (room, fit, spans) in sorted(groups.items(), key=lambda g: -g[1][0]):
+        sess_type = ckey[4]
+        for r in range(fit, room):
+            if not any(lo < b_hi and b_lo < hi for lo, hi in spans
+                       for b_lo, b_hi in busy[(sess_type, r, lo // inc_day)]):
+                for span in spans:
+                    busy[(sess_type, room, span[0] // inc_day)].remove(span)
+                    busy[(sess_type, r, span[0] // inc_day)].append(span)
+                moved[ckey] = r
+                break
+    return moved
+
+
+def _solve(model, max_time, num_workers, report, stop_event, on_solution=None):
+    """Run CP-SAT on ``model``, reporting statistics; returns (solver, status)."""
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max_time
+    solver.parameters.num_search_workers = num_workers
+    finished = threading.Event()
+    if stop_event is not None:
+        threading.Thread(target=_stop_on, args=(stop_event, finished, solver), daemon=True).start()
+    has_objective = model.HasObjective()
+    try:
+        status = solver.Solve(model, _ProgressCallback(report, has_objective, on_solution))
+    finally:
+        finished.set()
+    report(95, {
+        "status": solver.StatusName(status),
+        "objective": solver.ObjectiveValue() if has_objective else None,
+        "bound": solver.BestObjectiveBound() if has_objective else None,
+        "wall_time": round(solver.WallTime(), 3),
+    })
+    return solver, status
+
+
+def _explain(model, active, max_time, num_workers, stop_event):
+    """Courses that cannot all be scheduled together, as {"courses", "minimal"}, or None.
+
+    Every course's ``active`` literal is assumed; CP-SAT's infeasible core
+    is then shrunk by dropping one course at a time while the rest stays
+    infeasible. The set is ``minimal`` only if that finished within
+    ``max_time`` and every check proved its subset feasible; a check that
+    times out keeps its course without proving it is needed.
+    """
+    deadline = time.monotonic() + max_time
+    codes = {lit.Index(): code for code, lit in active.items()}
+    quiet = lambda value, stats=None: None
+    proven = True
+
+    def core(subset):
+        nonlocal proven
+        model.ClearAssumptions()
+        model.AddAssumptions([active[code] for code in subset])
+        solver, status = _solve(model, max(0.5, deadline - time.monotonic()), num_workers, quiet, stop_event)
+        if status == cp_model.UNKNOWN:
+            proven = False
+        if status != cp_model.INFEASIBLE:
+            return None
+        return [codes[i] for i in solver.SufficientAssumptionsForInfeasibility()]
+
+    conflict = core(list(active))
+    if not conflict:
+        return None
+    i = 0
+    while i < len(conflict) and time.monotonic() < deadline:
+        if stop_event is not None and stop_event.is_set():
+            return None
+        smaller = core(conflict[:i] + conflict[i + 1:])
+        if smaller:
+            conflict = [code for code in conflict if code in smaller]
+        else:
+            i += 1
+    return {"courses": sorted(conflict), "minimal": proven and i >= len(conflict)}
+
+
+def _no_schedule(stop_event, status):
+    if stop_event is not None and stop_event.is_set():
+        logger.info("Search stopped before a feasible schedule was found.")
+    elif status == cp_model.UNKNOWN:
+        logger.error("No schedule found within the time limit.")
+    else:
+        logger.error("No feasible schedule found (%s).", cp_model.CpSolver().StatusName(status))
+    return None, status
+
+
+def build_and_solve(courses, rooms, time_settings, days, current_events=(), compact_rooms=False,
+                    symmetry_breaking=True, hint=False, changed_courses=None, max_time=60,
+                    num_workers=8, optimize=False, weights=None, late_after=DEFAULT_LATE_AFTER,
+                    slot_minutes=None, faculty_unavailable=None, explain=False, report=None, on_solution=None,
+                    stop_event=None):
+    """Build and solve the CP-SAT timetable model for the given catalog.
+
+    Returns (events, CP-SAT status); events is None when no schedule was
+    found, and the status tells a proven INFEASIBLE from a timeout (UNKNOWN).
+    Nothing here touches Firestore or module state, so it can run in a
+    worker process; ``report`` receives progress percentages (plus solver
+    statistics once the search runs) and setting
+    ``stop_event`` (any object with ``wait``/``is_set``) aborts the search.
+
+    With ``compact_rooms`` the room is chosen once per course group (ckey)
+    through an exactly-one set of literals shared by all of the group's
+    sessions, instead of a channeled room IntVar per session.
+
+    ``symmetry_breaking`` orders the interchangeable sessions of a group and
+    the interchangeable blocks of a program/year by start time. ``hint``
+    seeds the search with ``current_events``.
+
+    ``changed_courses`` turns this into an incremental re-solve: sessions of
+    every other course stay pinned to their current day, start and room as
+    fixed intervals (keeping their schedule_id and faculty), and only the
+    listed courses get variables. Courses no longer in the catalog drop out.
+
+    ``optimize`` adds the soft objective of ``_add_objective`` with
+    ``weights`` (default DEFAULT_WEIGHTS; 0 disables a term) and
+    ``late_after`` as the hour after which sessions count as late. The
+    search then runs to ``max_time`` or optimality, passing the schedule of
+    an improving solution to ``on_solution`` at most every
+    SOLUTION_INTERVAL_SECONDS; stopping it returns the best so far.
+
+    Time runs on a ``TimeGrid`` of ``slot_minutes`` (default: the time
+    settings' ``slot_minutes``, else 30); session lengths come from
+    ``session_plan``. Event times are exact minutes, with each event's
+    integer ``start``/``end`` alongside its formatted ``period``.
+
+    Unavailability windows of rooms (``rooms["unavailable"]``, by room
+    name) and of faculty (``faculty_unavailable``, by name) are compiled
+    once into blocked slot spans. Each start variable's domain leaves out
+    the starts that no candidate room allows, and a room's own spans sit
+    in its no-overlap constraint as fixed intervals. Faculty only bind in
+    re-solves, where a changed course group keeps the teacher all of its
+    events had: its starts avoid the teacher's spans and its sessions the
+    teacher's other events.
+
+    Rooms with a capacity (``rooms["capacity"]``, by room name) only take
+    blocks whose enrollment (``block_enrollment``) they seat: rooms are
+    ordered by capacity, so each group's room domain is the suffix from its
+    smallest fitting room. Each group then moves to the smallest fitting
+    room that is free at all of its sessions, and ``optimize`` also weighs
+    ``room_size``.
+
+    ``explain`` is for models already found infeasible: every free course
+    gets a literal that switches all of its sessions on, and instead of a
+    schedule the result is ``_explain``'s set of conflicting courses.
+    """
+    report = report or (lambda value, stats=None: None)
+    courses = sorted(courses, key=lambda c: c.get("yearLevel", 0))
+    rooms = by_capacity(rooms)
+    sized = bool(rooms.get("capacity"))
+    seats = {sess_type: seat_counts(rooms, sess_type) for sess_type in ('lecture', 'lab')}
+    if explain:
+        # Shared room literals are what an inactive course can switch off
+        compact_rooms, optimize, hint = True, False, False
+
+    # Time discretization
+    grid = TimeGrid.from_settings(time_settings, len(days), slot_minutes)
+    inc_day = grid.slots_per_day
+    total_inc = grid.total
+    report(50)
+
+    current = _index_events(current_events, days, rooms, grid) if (hint or changed_courses is not None) else {}
+
+    # Courses whose events no longer match their units are re-solved as well
+    free_codes = None
+    if changed_courses is not None:
+        free_codes = set(changed_courses)
+        for course in courses:
+            for b in range(course.get("blocks", 1)):
+                blk = chr(ord('A') + b)
+                for sess_type, units, _ in session_plan(course, time_settings):
+                    ckey = (course["courseCode"], course["program"], course["yearLevel"], blk, sess_type)
+                    if len(current.get(ckey, [])) != units:
+                        free_codes.add(course["courseCode"])
+    report(55)
+
+    model = cp_model.CpModel()
+    schedule_id = max((ev["schedule_id"] for ev in current_events), default=0) + 1 if free_codes is not None else 1
+    all_sessions = []  
+    extra_seats = {}
+    pinned_events = []
+    first_starts = {}
+    section_intervals = defaultdict(list)
+    room_intervals = {('lecture', r): [] for r in range(len(rooms['lecture']))}
+    room_intervals.update({('lab', r): [] for r in range(len(rooms['lab']))})
+    faculty_intervals = defaultdict(list)
+    session_faculty = {}
+    pinned_rooms = []
+    active = {}
+    # Unavailability, compiled once into blocked slot spans; rooms block them as fixed intervals
+    unavailable = rooms.get("unavailable") or {}
+    room_blocked = {sess_type: [grid.blocked(unavailable.get(name, ()), days) for name in rooms[sess_type]]
+                    for sess_type in ('lecture', 'lab')}
+    faculty_blocked = {name: grid.blocked(windows, days) for name, windows in (faculty_unavailable or {}).items()}
+    for sess_type, blocked in room_blocked.items():
+        for r, spans in enumerate(blocked):
+            for lo, hi in spans:
+                room_intervals[(sess_type, r)].append(
+                    model.NewFixedSizeIntervalVar(lo, hi - lo, f"blocked_{sess_type}_{r}_{lo}"))
+    report(60)
+    
+    for idx, course in enumerate(courses, start=1):
+        code, title, prog, yr = (course["courseCode"], course["title"], course["program"], course["yearLevel"])
+        blocks = course.get("blocks", 1)
+        day_vars = []
+
+        if free_codes is not None and code not in free_codes:
+            # Pinned course: fixed intervals only, no variables
+            for b in range(blocks):
+                blk = chr(ord('A') + b)
+                for sess_type in ('lecture', 'lab'):
+                    for s_slot, e_slot, day_idx, room_idx, ev in current.get((code, prog, yr, blk, sess_type), []):
+                        lo = max(s_slot, day_idx * inc_day)
+                        hi = min(e_slot, (day_idx + 1) * inc_day)
+                        if lo < hi:
+                            iv = model.NewFixedSizeIntervalVar(lo, hi - lo, f"pin_{ev['schedule_id']}")
+                            section_intervals[(prog, yr, blk)].append(iv)
+                            # Events placed before their room became unavailable stay put
+                            if room_idx is not None and not any(lo < b_hi and b_lo < hi for b_lo, b_hi
+                                                                in room_blocked[sess_type][room_idx]):
+                                room_intervals[(sess_type, room_idx)].append(iv)
+                                pinned_rooms.append((sess_type, room_idx, lo, hi))
+                            if ev.get("faculty"):
+                                faculty_intervals[ev["faculty"]].append(iv)
+                        pinned_events.append(dict(ev))
+            continue
+
+        if explain:
+            active[code] = model.NewBoolVar(f"active_{code}")
+        for b in range(blocks):
+            blk = chr(ord('A') + b)
+            for sess_type, units, minutes in session_plan(course, time_settings):
+                dur = grid.length(minutes)
+                # Only rooms from ``fit`` on seat the block
+                n_rooms = len(rooms[sess_type])
+                fit = smallest_fit(rooms, sess_type, block_enrollment(course, blk))
+                if compact_rooms and units > 0:
+                    # One literal per room for the whole group
+                    group_lits = [model.NewBoolVar(f"{code}_{sess_type}_{b}_use_room_{r}")
+                                  for r in range(fit, n_rooms)]
+                    if explain:
+                        model.Add(sum(group_lits) == active[code])
+                    else:
+                        model.AddExactlyOne(group_lits)
+                    group_rv = cp_model.LinearExpr.WeightedSum(group_lits, list(range(fit, n_rooms)))
+                elif units > 0 and fit == n_rooms:
+                    # No room seats the block
+                    model.AddBoolOr([])
+                ckey = (code, prog, yr, blk, sess_type)
+                group_hints = current.get(ckey, []) if hint else []
+                teacher = None
+                if free_codes is not None:
+                    teachers = {ev.get("faculty") or "" for *_, ev in current.get(ckey, [])}
+                    teacher = teachers.pop() if len(teachers) == 1 else None
+                # Starts that end the same day, outside the teacher's and at least one room's blocked spans
+                t_blocked = faculty_blocked.get(teacher, ())
+                room_spans = [tuple(sorted(set(spans) | set(t_blocked))) for spans in room_blocked[sess_type][fit:]]
+                domain = grid.start_domain(dur, *sorted(set(room_spans)))
+                prev_s = None
+                for i in range(units):
+                    s = model.NewIntVarFromDomain(domain, f"{code}_{sess_type}_{b}_{i}_s")
+                    # End variable and consistency with duration
+                    e = model.NewIntVar(0, total_inc, f"{code}_{sess_type}_{b}_{i}_e")
+                    model.Add(e == s + dur)
+                    # Sessions of a group are interchangeable: fix their order
+                    if symmetry_breaking and prev_s is not None:
+                        model.Add(prev_s + dur <= s)
+                    prev_s = s
+                    first_starts.setdefault((code, prog, yr, b), s)
+                    # Day variable constraints
+                    dvar = model.NewIntVar(0, len(days) - 1, f"{code}_{sess_type}_{b}_{i}_d")
+                    model.Add(s >= dvar * inc_day)
+                    model.Add(s < (dvar + 1) * inc_day)
+                    day_vars.append(dvar)
+                    # Interval for section
+                    if explain:
+                        iv = model.NewOptionalIntervalVar(s, dur, e, active[code], f"iv_{sess_type}_{schedule_id}")
+                    else:
+                        iv = model.NewIntervalVar(s, dur, e, f"iv_{sess_type}_{schedule_id}")
+                    section_intervals[(prog, yr, blk)].append(iv)
+                    if teacher:
+                        faculty_intervals[teacher].append(iv)
+                        session_faculty[schedule_id] = teacher
+                    if compact_rooms:
+                        # Optional intervals per room, sharing the group literals
+                        rv = group_rv
+                        room_lits = group_lits
+                        for r, lit in enumerate(group_lits, start=fit):
+                            opt_iv = model.NewOptionalIntervalVar(s, dur, e, lit, f"opt_iv_{schedule_id}_{sess_type}_{r}")
+                            room_intervals[(sess_type, r)].append(opt_iv)
+                    else:
+                        # Room assignment variable
+                        rv = model.NewIntVar(min(fit, n_rooms - 1), n_rooms - 1, f"{code}_{sess_type}_{b}_{i}_room")
+                        # Optional intervals per room
+                        room_lits = []
+                        for r in range(fit, n_rooms):
+                            lit = model.NewBoolVar(f"use_{schedule_id}_room_{r}")
+                            room_lits.append(lit)
+                            model.Add(rv == r).OnlyEnforceIf(lit)
+                            model.Add(rv != r).OnlyEnforceIf(lit.Not())
+                            opt_iv = model.NewOptionalIntervalVar(s, dur, e, lit, f"opt_iv_{schedule_id}_{sess_type}_{r}")
+                            room_intervals[(sess_type, r)].append(opt_iv)
+                    h_start, _, h_day, h_room, _ = group_hints[i] if i < len(group_hints) else (None,) * 5
+                    if h_room is not None and h_room >= fit and 0 <= h_start - h_day * inc_day < inc_day:
+                        model.AddHint(s, h_start)
+                        model.AddHint(e, h_start + dur)
+                        model.AddHint(dvar, h_day)
+                        if not compact_rooms:
+                            model.AddHint(rv, h_room)
+                        elif i == 0:
+                            for r, lit in enumerate(group_lits, start=fit):
+                                model.AddHint(lit, r == h_room)
+                    all_sessions.append((schedule_id, ckey, title, s, e, rv, dvar, dur, minutes,
+                                         fit if sized else None))
+                    if sized and room_lits:
+                        # Seats left empty compared with the smallest room that fits
+                        extra_seats[schedule_id] = cp_model.LinearExpr.WeightedSum(
+                            room_lits, [seats[sess_type][r] - seats[sess_type][fit] for r in range(fit, n_rooms)])
+                    schedule_id += 1
+        # Ensure different days if fewer sessions than days
+        if len(day_vars) <= len(days):
+            model.AddAllDifferent(day_vars)
+        # Update progress per course block
+        report(60 + int(30 * idx / len(courses)))  # up to 90
+
+    report(90)  # Variables and intervals created
+
+    # Blocks b and b+1 of a program/year are interchangeable when every
+    # course there has either both or neither, and seats both in the same
+    # rooms; order them on one anchor course.
+    # Pinned sessions break that symmetry, so skip it on incremental re-solves.
+    if symmetry_breaking and free_codes is None:
+        def same_rooms(course, b):
+            blk, nxt = chr(ord('A') + b), chr(ord('A') + b + 1)
+            return all(smallest_fit(rooms, sess_type, block_enrollment(course, blk))
+                       == smallest_fit(rooms, sess_type, block_enrollment(course, nxt))
+                       for sess_type in ('lecture', 'lab'))
+
+        by_section = defaultdict(list)
+        for course in courses:
+            by_section[(course["program"], course["yearLevel"])].append(course)
+        for (prog, yr), sec_courses in by_section.items():
+            block_counts = {c.get("blocks", 1) for c in sec_courses}
+            for b in range(max(block_counts) - 1):
+                if b + 1 in block_counts:
+                    continue
+                if not all(same_rooms(c, b) for c in sec_courses if c.get("blocks", 1) > b + 1):
+                    continue
+                anchor = next(c["courseCode"] for c in sec_courses if c.get("blocks", 1) > b + 1)
+                s_cur = first_starts.get((anchor, prog, yr, b))
+                s_next = first_starts.get((anchor, prog, yr, b + 1))
+                if s_cur is not None and s_next is not None:
+                    model.Add(s_cur <= s_next)
+
+    # Room consistency constraints (implied by the shared literals in compact mode)
+    if not compact_rooms:
+        by_ckey = defaultdict(list)
+        for sid, ckey, title, s, e, rv, dvar, dur, minutes, fit in all_sessions:
+            by_ckey[ckey].append(rv)
+        for rvs in by_ckey.values():
+            for v1 in rvs[1:]:
+                model.Add(v1 == rvs[0])
+
+    # No overlap constraints
+    for ivs in section_intervals.values():
+        model.AddNoOverlap(ivs)
+    for ivs in room_intervals.values():
+        model.AddNoOverlap(ivs)
+    for ivs in faculty_intervals.values():
+        if len(ivs) > 1:
+            model.AddNoOverlap(ivs)
+
+    def extract(value):
+        moved = _smaller_rooms(value, all_sessions, room_blocked, pinned_rooms, inc_day) if sized else {}
+        schedule = []
+        for sid, ckey, title, s, e, rv, dvar, dur, minutes, fit in all_sessions:
+            code, prog, yr, blk, sess_type = ckey
+            room_idx = moved.get(ckey, value(rv))
+            day_idx = value(dvar)
+            start = grid.minute(value(s))
+            schedule.append({
+                'schedule_id': sid,
+                'courseCode': code,
+                'title': title,
+                'program': prog,
+                'year': yr,
+                'session': 'Lecture' if sess_type == 'lecture' else 'Laboratory',
+                'block': blk,
+                'day': days[day_idx],
+                'period': f"{format_clock(start)} - {format_clock(start + minutes)}",
+                'room': rooms[sess_type][room_idx],
+                'start': start,
+                'end': start + minutes
+            })
+            if sid in session_faculty:
+                schedule[-1]['faculty'] = session_faculty[sid]
+        schedule.extend(pinned_events)
+        schedule.sort(key=lambda x: (days.index(x['day']), x['period']))
+        return schedule
+
+    if explain:
+        return _explain(model, active, max_time, num_workers, stop_event)
+    report(95)  # Solver configured, starting solve
+    if stop_event is not None and stop_event.is_set():
+        return None, cp_model.UNKNOWN
+    if optimize:
+        # Plain feasibility finds a first schedule much sooner; it is streamed
+        # right away and seeds the optimizing search with the time left
+        solver, status = _solve(model, max_time, num_workers, report, stop_event)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return _no_schedule(stop_event, status)
+        first = extract(solver.Value)
+        if on_solution:
+            on_solution(first)
+        model.Proto().solution_hint.Clear()
+        model.Proto().solution_hint.vars.extend(range(len(model.Proto().variables)))
+        model.Proto().solution_hint.values.extend(solver.ResponseProto().solution)
+        late_slot = grid.offset(late_after * 60)
+        _add_objective(model, all_sessions, grid, late_slot, {**DEFAULT_WEIGHTS, **(weights or {})}, extra_seats)
+        max_time = max(1, max_time - solver.WallTime())
+        if stop_event is not None and stop_event.is_set():
+            return first, status
+
+    stream = (lambda cb: on_solution(extract(cb.Value))) if on_solution and model.HasObjective() else None
+    solver, status = _solve(model, max_time, num_workers, report, stop_event, stream)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return (first, cp_model.FEASIBLE) if optimize else _no_schedule(stop_event, status)
+    return extract(solver.Value), status
+
+
+def _split_rooms(parts, rooms, time_settings):
+    """Give each partition a disjoint share of every room type, sized by demand in minutes.
+
+    Rooms are dealt out largest first, so every partition gets a spread of
+    capacities. When a room type has fewer rooms than partitions needing it, rooms are
+    handed out round-robin and the resulting clashes are left to the repair pass.
+    """
+    budgets = {key: {"lecture": [], "lab": [], "unavailable": rooms.get("unavailable") or {},
+                     "capacity": rooms.get("capacity") or {}} for key in parts}
+    demands = {key: defaultdict(int) for key in parts}
+    for key, part in parts.items():
+        for c in part:
+            for sess_type, units, minutes in session_plan(c, time_settings):
+                demands[key][sess_type] += units * minutes * c.get("blocks", 1)
+    for sess_type in ("lecture", "lab"):
+        demand = {key: demands[key][sess_type] for key in parts}
+        names = by_capacity(rooms)[sess_type][::-1]
+        takers = [key for key, d in demand.items() if d > 0]
+        if not takers or not names:
+            continue
+        if len(names) < len(takers):
+            for i, key in enumerate(takers):
+                budgets[key][sess_type] = [names[i % len(names)]]
+            continue
+
+        total = sum(demand[key] for key in takers)
+        spare = len(names) - len(takers)
+        shares = {key: 1 + spare * demand[key] // total for key in takers}
+        leftover = len(names) - sum(shares.values())
+        for key in sorted(takers, key=lambda k: spare * demand[k] % total, reverse=True)[:leftover]:
+            shares[key] += 1
+        pos = 0
+        while pos < len(names):
+            for key in takers:
+                if pos < len(names) and len(budgets[key][sess_type]) < shares[key]:
+                    budgets[key][sess_type].append(names[pos])
+                    pos += 1
+    return budgets
+
+
+def _room_conflicts(events):
+    """Course codes of events that overlap an earlier event in the same room."""
+    by_room = defaultdict(list)
+    for ev in events:
+        start, end = (ev["start"], ev["end"]) if "start" in ev else get_start_end(ev["period"])
+        by_room[(ev["room"], ev["day"])].append((start, end, ev["courseCode"]))
+    codes = set()
+    for booked in by_room.values():
+        booked.sort()
+        latest_end = -1
+        for start, end, code in booked:
+            if start < latest_end:
+                codes.add(code)
+            latest_end = max(latest_end, end)
+    return codes
+
+
+def solve_decomposed(courses, rooms, time_settings, days, by_year=False, report=None, stop_event=None,
+                     **options):
+    """Solve one model per program (or program/year) in parallel, then repair.
+
+    Partitions share nothing but rooms, so each gets its own room budget and
+    runs in a separate process. Partitions that fail, and courses left in a
+    room clash, are re-solved in a final pass with every other event pinned.
+    Returns (events, status) like ``build_and_solve``.
+    """
+    report = report or (lambda value, stats=None: None)
+    parts = defaultdict(list)
+    for course in courses:
+        key = (course["program"], course["yearLevel"]) if by_year else course["program"]
+        parts[key].append(course)
+    budgets = _split_rooms(parts, rooms, time_settings)
+
+    cpus = os.cpu_count() or 1
+    workers = min(len(parts), cpus)
+    events, failed = [], set()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {
+            pool.submit(build_and_solve, part, budgets[key], time_settings, days,
+                        num_workers=max(1, cpus // workers), stop_event=stop_event, **options): key
+            for key, part in parts.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            result, status = future.result()
+            if result is None:
+                logger.warning("Partition %s unsolved within its room budget (%s)", key,
+                               cp_model.CpSolver().StatusName(status))
+                failed.update(c["courseCode"] for c in parts[key])
+            else:
+                events.extend(result)
+            report(60 + int(30 * done / len(futures)))
+
+    for sid, ev in enumerate(events, start=1):
+        ev["schedule_id"] = sid
+
+    if stop_event is not None and stop_event.is_set():
+        return None, cp_model.UNKNOWN
+    redo = failed | _room_conflicts(events)
+    report(95)
+    if not redo:
+        events.sort(key=lambda x: (days.index(x['day']), x['period']))
+        return events, cp_model.FEASIBLE
+    logger.info("Repair pass over %d course(s)", len(redo))
+    return build_and_solve(courses, rooms, time_settings, days, current_events=events,
+                           changed_courses=redo, num_workers=cpus, stop_event=stop_event, **options)
+
+
+def report_to_queue(queue, job_id, value, stats=None):
+    """Progress reporter for worker processes; pair it with functools.partial."""
+    queue.put((job_id, value, stats, None))
+
+
+def solution_to_queue(queue, job_id, schedule):
+    """``on_solution`` for worker processes, sending the schedule with no progress value."""
+    queue.put((job_id, None, None, schedule))
+
+
+def solve_schedule(courses, rooms, time_settings, days, current_events=(), decompose=False, by_year=False,
+                   hint=False, changed_courses=None, report=None, on_solution=None, stop_event=None, **options):
+    """Dispatch to the decomposed or the single-model solve; None if stopped or unsolved.
+
+    Partitions of a decomposed solve are not whole schedules, so only the
+    single-model solve streams to ``on_solution``.
+
+    Raises InfeasibleSchedule when ``check_capacity`` rules a full solve out
+    before it starts, or when the solver proves there is no schedule; the
+    set of courses that cannot be scheduled together is then looked for.
+    Raises ScheduleTimeout when the time limit ran out first.
+    """
+    if changed_courses is None:
+        problems = check_capacity(courses, rooms, time_settings, days, options.get("slot_minutes"))
+        if problems:
+            raise InfeasibleSchedule(problems)
+    if decompose and changed_courses is None:
+        result, status = solve_decomposed(courses, rooms, time_settings, days, by_year, report=report,
+                                          stop_event=stop_event, **options)
+    else:
+        result, status = build_and_solve(courses, rooms, time_settings, days, current_events=current_events,
+                                         hint=hint, changed_courses=changed_courses, report=report,
+                                         on_solution=on_solution, stop_event=stop_event, **options)
+    if result is not None or (stop_event is not None and stop_event.is_set()):
+        return result
+    if status == cp_model.UNKNOWN:
+        raise ScheduleTimeout(f"No schedule found within {options.get('max_time', 60)} s")
+    if status != cp_model.INFEASIBLE:
+        return None
+    conflict = build_and_solve(courses, rooms, time_settings, days, current_events=current_events,
+                               changed_courses=changed_courses, slot_minutes=options.get("slot_minutes"),
+                               faculty_unavailable=options.get("faculty_unavailable"), explain=True,
+                               max_time=EXPLAIN_MAX_TIME, stop_event=stop_event)
+    if stop_event is not None and stop_event.is_set():
+        return None
+    if conflict is None:
+        # Proven infeasible, but no conflicting set was found in time
+        conflict = {"courses": [], "minimal": False}
+    logger.info("Conflicting courses: %s", conflict["courses"])
+    raise InfeasibleSchedule([{"check": "conflict", "scope": "courses that cannot be scheduled together",
+                               **conflict}])
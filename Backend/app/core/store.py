@@ -0,0 +1,336 @@
+import threading
+import uuid
+from bisect import bisect_left, insort
+from collections import defaultdict, deque
+import numpy as np
+from app.core.table import EventTable, MISSING
+from app.utils.helper import get_start_end
+
+CHANGE_RING_SIZE = 2000
+
+
+class _IntervalList:
+    """Intervals of one index bucket, kept sorted by start minute.
+
+    ``max_len`` bounds how far before a query window an overlapping interval
+    can start, so overlap lookups only bisect and scan that slice. It never
+    shrinks on removal, which keeps it a safe upper bound.
+    """
+
+    __slots__ = ("items", "max_len")
+
+    def __init__(self):
+        self.items = []
+        self.max_len = 0
+
+    def add(self, start, end, row, bulk=False):
+        if bulk:
+            self.items.append((start, end, row))
+        else:
+            insort(self.items, (start, end, row))
+        self.max_len = max(self.max_len, end - start)
+
+    def remove(self, start, end, row):
+        i = bisect_left(self.items, (start, end, row))
+        if i < len(self.items) and self.items[i] == (start, end, row):
+            del self.items[i]
+
+    def overlapping(self, start, end):
+        lo = bisect_left(self.items, (start - self.max_len + 1,))
+        hi = bisect_left(self.items, (end,))
+        return [row for s, e, row in self.items[lo:hi] if e > start]
+
+
+class ScheduleStore:
+    """The generated schedule, indexed for per-request lookups.
+
+    Events are keyed by schedule_id like the old flat dict and read the
+    same way (``get``, ``values``, ``len``), but live as rows of a columnar
+    ``EventTable``; reads return freshly materialized dicts, so changes
+    must go through ``add``, ``update``, ``remove`` and ``replace``. Each
+    of those is passed on to ``subscribe``d listeners as ``(op, *args)``.
+    Each event's period is parsed once on insert into integer
+    ``start``/``end`` minutes.
+
+    Indexes: course group (courseCode, program, block), faculty, section
+    (program, year, block, day) and room (room, day), all keyed by the
+    table's integer codes. The last three keep sorted intervals per day for
+    logarithmic overlap queries. Each faculty's scheduled minutes are
+    summed as events are indexed and unindexed, for ``faculty_loads``.
+
+    ``version`` increases with every mutation; together with ``epoch``,
+    which is new for each process, it identifies the schedule's content.
+    The last CHANGE_RING_SIZE changes are kept for ``changes_since``.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._changes = deque(maxlen=CHANGE_RING_SIZE)
+        self.table = EventTable()
+        self._rows = {}
+        self._groups = defaultdict(dict)
+        self._faculty = defaultdict(dict)
+        self._faculty_days = defaultdict(_IntervalList)
+        self._faculty_minutes = defaultdict(int)
+        self._sections = defaultdict(_IntervalList)
+        self._rooms = defaultdict(_IntervalList)
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    def subscribe(self, listener):
+        """Call ``listener(op, *args)`` after every mutation, under the store lock."""
+        self._listeners.append(listener)
+
+    def _notify(self, op, *args, change=None):
+        self.version += 1
+        self._changes.append((self.version, change))
+        for listener in self._listeners:
+            listener(op, *args)
+
+    # Mapping-style reads
+
+    def get(self, schedule_id, default=None):
+        row = self._rows.get(schedule_id)
+        return default if row is None else self.table.row_dict(row)
+
+    def __getitem__(self, schedule_id):
+        return self.table.row_dict(self._rows[schedule_id])
+
+    def __contains__(self, schedule_id):
+        return schedule_id in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def values(self):
+        return self.table.row_dicts(list(self._rows.values()))
+
+    # Index maintenance
+
+    def _keys(self, row, columns):
+        """Index keys of a row, read from ``columns`` (arrays or lists)."""
+        strings = self.table.strings
+        course, program, year, block, day, room, faculty, start, end = (
+            int(columns[name][row]) for name in
+            ("courseCode", "program", "year", "block", "day", "room", "faculty", "start", "end")
+        )
+        if faculty == MISSING or not strings["faculty"].values[faculty]:
+            faculty = None
+        if room == MISSING or not strings["room"].values[room]:
+            room = None
+        span = (start, end, row) if start != MISSING else None
+        return (course, program, block), faculty, (program, year, block, day), room, day, span
+
+    def _index(self, row, columns=None, bulk=False):
+        group, faculty, section, room, day, span = self._keys(row, columns or self.table.columns)
+        self._groups[group][row] = None
+        if faculty is not None:
+            self._faculty[faculty][row] = None
+        if span is None:
+            return
+        self._sections[section].add(*span, bulk)
+        if room is not None:
+            self._rooms[(room, day)].add(*span, bulk)
+        if faculty is not None:
+            self._faculty_days[(faculty, day)].add(*span, bulk)
+            self._faculty_minutes[faculty] += span[1] - span[0]
+
+    def _unindex(self, row):
+        group, faculty, section, room, day, span = self._keys(row, self.table.columns)
+        self._groups[group].pop(row, None)
+        if faculty is not None:
+            self._faculty[faculty].pop(row, None)
+        if span is None:
+            return
+        self._sections[section].remove(*span)
+        if room is not None:
+            self._rooms[(room, day)].remove(*span)
+        if faculty is not None:
+            self._faculty_days[(faculty, day)].remove(*span)
+            self._faculty_minutes[faculty] -= span[1] - span[0]
+            if not self._faculty_minutes[faculty]:
+                del self._faculty_minutes[faculty]
+
+    def _rebuild_indexes(self):
+        self._clear_indexes()
+        table = self.table
+        columns = {name: column[:table.size].tolist() for name, column in table.columns.items()}
+        self._rows = {columns["schedule_id"][row]: row for row in table.live_rows().tolist()}
+        for row in self._rows.values():
+            self._index(row, columns, bulk=True)
+        for index in (self._faculty_days, self._sections, self._rooms):
+            for bucket in index.values():
+                bucket.items.sort()
+
+    def _clear_indexes(self):
+        self._groups.clear()
+        self._faculty.clear()
+        self._faculty_days.clear()
+        self._faculty_minutes.clear()
+        self._sections.clear()
+        self._rooms.clear()
+
+    @staticmethod
+    def _parse_period(fields):
+        if fields.get("period"):
+            fields["start"], fields["end"] = get_start_end(fields["period"])
+
+    # Mutations
+
+    def add(self, event):
+        with self._lock:
+            old = self._rows.pop(event["schedule_id"], None)
+            if old is not None:
+                self._unindex(old)
+                self.table.kill(old)
+            self._parse_period(event)
+            row = self._rows[event["schedule_id"]] = self.table.append(event)
+            self._index(row)
+            self._notify("add", event, change={"op": "upsert", "event": self.table.row_dict(row)})
+            return event
+
+    def update(self, schedule_id, fields):
+        """Apply ``fields`` to an event, re-index it and return the updated event."""
+        with self._lock:
+            row = self._rows[schedule_id]
+            self._unindex(row)
+            changes = dict(fields)
+            if "period" in changes:
+                self._parse_period(changes)
+            self.table.set(row, changes)
+            self._index(row)
+            event = self.table.row_dict(row)
+            self._notify("update", schedule_id, fields, change={"op": "upsert", "event": event})
+            return dict(event)
+
+    def remove(self, schedule_id):
+        with self._lock:
+            row = self._rows.pop(schedule_id, None)
+            if row is None:
+                return None
+            event = self.table.row_dict(row)
+            self._unindex(row)
+            self.table.kill(row)
+            self._notify("remove", schedule_id, change={"op": "remove", "schedule_id": schedule_id})
+            return event
+
+    def replace(self, events):
+        """Swap in a whole new schedule."""
+        with self._lock:
+            table = EventTable(capacity=max(1024, len(events)))
+            rows = {}
+            for event in events:
+                self._parse_period(event)
+                if event["schedule_id"] in rows:
+                    table.kill(rows[event["schedule_id"]])
+                rows[event["schedule_id"]] = table.append(event)
+            self.table = table
+            self._rebuild_indexes()
+            self._notify("replace")
+
+    def load_state(self, state):
+        """Replace the schedule with a table restored by ``EventTable.from_state``."""
+        with self._lock:
+            self.table = EventTable.from_state(state)
+            self._rebuild_indexes()
+
+    def clear(self):
+        self.replace([])
+
+    # Queries
+
+    def changes_since(self, since):
+        """Changes after version ``since``, one per event, oldest first.
+
+        Returns None when the client has to refetch: the ring no longer
+        reaches back to ``since``, the whole schedule was replaced in the
+        meantime, or ``since`` is from the future (e.g. another process).
+        """
+        with self._lock:
+            if since > self.version:
+                return None
+            if since == self.version:
+                return []
+            if not self._changes or self._changes[0][0] > since + 1:
+                return None
+            latest = {}
+            for version, change in reversed(self._changes):
+                if version <= since:
+                    break
+                if change is None:
+                    return None
+                key = change["event"]["schedule_id"] if change["op"] == "upsert" else change["schedule_id"]
+                latest.setdefault(key, (version, change))
+            return [dict(change, version=version) for version, change in sorted(latest.values(), key=lambda c: c[0])]
+
+    def select(self, after=None, limit=None, **filters):
+        """Rows matching ``filters`` (field=value, None = any), by schedule_id.
+
+        Only rows with a schedule_id greater than ``after`` are returned, at
+        most ``limit`` of them. Returns (table, rows, total) where ``total``
+        counts every match regardless of ``after``/``limit``; materialize
+        with ``table.row_dicts``.
+        """
+        with self._lock:
+            table = self.table
+            size = table.size
+            mask = table.alive[:size].copy()
+            for name, value in filters.items():
+                if value is None:
+                    continue
+                code = table.strings[name].lookup(value)
+                if code == MISSING:
+                    mask[:] = False
+                    break
+                mask &= table.columns[name][:size] == code
+            rows = np.flatnonzero(mask)
+            total = len(rows)
+            sids = table.columns["schedule_id"][rows]
+            order = np.argsort(sids, kind="stable")
+            rows, sids = rows[order], sids[order]
+            if after is not None:
+                rows = rows[np.searchsorted(sids, after, side="right"):]
+            if limit is not None:
+                rows = rows[:limit]
+            return table, rows, total
+
+    def _events(self, rows):
+        return self.table.row_dicts(list(rows))
+
+    def _codes(self, **values):
+        strings = self.table.strings
+        return tuple(strings[name].lookup(value) for name, value in values.items())
+
+    def group(self, course_code, program, block):
+        """Every event of one course block."""
+        key = self._codes(courseCode=course_code, program=program, block=block)
+        return self._events(self._groups.get(key, ()))
+
+    def faculty_loads(self):
+        """Scheduled hours per faculty name, for every faculty with timed events."""
+        with self._lock:
+            names = self.table.strings["faculty"].values
+            return {names[code]: minutes / 60 for code, minutes in self._faculty_minutes.items()}
+
+    def by_faculty(self, name):
+        return self._events(self._faculty.get(self.table.strings["faculty"].lookup(name), ()))
+
+    def _overlapping(self, index, key, start, end):
+        bucket = index.get(key)
+        if bucket is None:
+            return []
+        return self._events(bucket.overlapping(start, end))
+
+    def faculty_overlaps(self, name, day, start, end):
+        return self._overlapping(self._faculty_days, self._codes(faculty=name, day=day), start, end)
+
+    def section_overlaps(self, program, year, block, day, start, end):
+        return self._overlapping(self._sections, self._codes(program=program, year=year, block=block, day=day),
+                                 start, end)
+
+    def room_overlaps(self, room, day, start, end):
+        return self._overlapping(self._rooms, self._codes(room=room, day=day), start, end)
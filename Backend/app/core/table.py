@@ -0,0 +1,138 @@
+import numpy as np
+
+MISSING = -1
+
+
+class Interner:
+    """Two-way map between column values and dense integer codes."""
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value):
+        return self.codes.get(value, MISSING)
+
+
+class EventTable:
+    """Schedule events stored column by column in NumPy arrays.
+
+    schedule_id and the start/end minutes are plain integer columns; every
+    other known field is dictionary-encoded into int32 codes against a
+    per-column ``Interner``. MISSING marks a field the event does not have.
+    Unknown fields go to a sparse per-row ``extra`` dict. Rows are appended
+    and only ever marked dead, so row numbers stay valid until the table is
+    rebuilt. Dicts are materialized only by ``row_dict``/``row_dicts``.
+    """
+
+    NUMERIC = {"schedule_id": np.int64, "start": np.int32, "end": np.int32}
+    CODED = ("courseCode", "title", "program", "year", "session", "block", "day", "period", "room", "faculty")
+    FIELDS = ("schedule_id",) + CODED + ("start", "end")
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.columns = {name: np.full(capacity, MISSING, self._dtype(name)) for name in self.FIELDS}
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.strings = {name: Interner() for name in self.CODED}
+        self.extra = {}
+
+    @classmethod
+    def _dtype(cls, name):
+        return cls.NUMERIC.get(name, np.int32)
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self.alive))
+        for name, column in self.columns.items():
+            grown = np.full(capacity, MISSING, column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.size] = self.alive[:self.size]
+        self.alive = alive
+
+    def append(self, event):
+        if self.size == len(self.alive):
+            self._grow()
+        row = self.size
+        self.size += 1
+        self.alive[row] = True
+        self.set(row, event)
+        return row
+
+    def set(self, row, fields):
+        for name, value in fields.items():
+            if name in self.strings:
+                self.columns[name][row] = self.strings[name].code(value)
+            elif name in self.columns:
+                self.columns[name][row] = MISSING if value is None else value
+            else:
+                self.extra.setdefault(row, {})[name] = value
+
+    def kill(self, row):
+        self.alive[row] = False
+        self.extra.pop(row, None)
+
+    def value(self, row, name):
+        code = int(self.columns[name][row])
+        if code == MISSING:
+            return None
+        return self.strings[name].values[code] if name in self.strings else code
+
+    def live_rows(self):
+        return np.flatnonzero(self.alive[:self.size])
+
+    def row_dict(self, row):
+        event = {}
+        for name in self.FIELDS:
+            code = int(self.columns[name][row])
+            if code != MISSING:
+                event[name] = self.strings[name].values[code] if name in self.strings else code
+        event.update(self.extra.get(row, ()))
+        return event
+
+    def row_dicts(self, rows):
+        """Materialize events for ``rows``, in the order given."""
+        rows = np.asarray(rows, dtype=np.int64)
+        events = [{} for _ in range(len(rows))]
+        for name in self.FIELDS:
+            codes = self.columns[name][rows].tolist()
+            values = self.strings[name].values if name in self.strings else None
+            for event, code in zip(events, codes):
+                if code != MISSING:
+                    event[name] = values[code] if values is not None else code
+        for event, row in zip(events, rows.tolist()):
+            if row in self.extra:
+                event.update(self.extra[row])
+        return events
+
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values()) + self.alive.nbytes
+
+    def to_state(self):
+        """Live rows as raw column buffers plus the string tables, for snapshots."""
+        live = self.live_rows()
+        position = {row: i for i, row in enumerate(live.tolist())}
+        return {
+            "size": len(live),
+            "columns": {name: column[live].tobytes() for name, column in self.columns.items()},
+            "strings": {name: interner.values for name, interner in self.strings.items()},
+            "extra": {position[row]: fields for row, fields in self.extra.items() if row in position},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        table = cls(capacity=max(1024, state["size"]))
+        size = table.size = state["size"]
+        for name, buf in state["columns"].items():
+            table.columns[name][:size] = np.frombuffer(buf, dtype=cls._dtype(name))
+        table.alive[:size] = True
+        table.strings = {name: Interner(values) for name, values in state["strings"].items()}
+        table.extra = dict(state["extra"])
+        return table
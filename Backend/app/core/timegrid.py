@@ -0,0 +1,141 @@
+from ortools.sat.python import cp_model
+from app.utils.helper import parse_window
+
+DEFAULT_SLOT_MINUTES = 30
+DEFAULT_LECTURE_MINUTES = 60
+DEFAULT_LAB_MINUTES = 90
+
+
+def session_plan(course, time_settings):
+    """(session type, session count, minutes per session) of one block of ``course``.
+
+    A lecture unit is one session and a lab unit two; their length comes
+    from the course's ``lectureMinutes``/``labMinutes``, else from the time
+    settings' ``lecture_minutes``/``lab_minutes``.
+    """
+    lecture = course.get("lectureMinutes") or time_settings.get("lecture_minutes") or DEFAULT_LECTURE_MINUTES
+    lab = course.get("labMinutes") or time_settings.get("lab_minutes") or DEFAULT_LAB_MINUTES
+    return [("lecture", course["unitsLecture"], lecture), ("lab", course["unitsLab"] * 2, lab)]
+
+
+class TimeGrid:
+    """The week discretized into fixed-size slots for the solver.
+
+    Slot ``t`` is day ``t // slots_per_day``, starting ``slot_minutes *
+    (t % slots_per_day)`` minutes after ``start_time`` (an hour). A session
+    of any length in minutes covers the slots it touches, so lengths that
+    are not a multiple of the slot size round up on the grid while event
+    times stay exact.
+    """
+
+    def __init__(self, start_time, end_time, n_days, slot_minutes=DEFAULT_SLOT_MINUTES):
+        if slot_minutes <= 0:
+            raise ValueError("slot_minutes must be positive")
+        self.day_start = start_time * 60
+        self.slot_minutes = slot_minutes
+        self.n_days = n_days
+        self.slots_per_day = (end_time - start_time) * 60 // slot_minutes
+        self.total = self.slots_per_day * n_days
+        self._starts = {}
+
+    @classmethod
+    def from_settings(cls, time_settings, n_days, slot_minutes=None):
+        return cls(time_settings["start_time"], time_settings["end_time"], n_days,
+                   slot_minutes or time_settings.get("slot_minutes") or DEFAULT_SLOT_MINUTES)
+
+    def length(self, minutes):
+        """Slots covered by a session of ``minutes``."""
+        return -(-minutes // self.slot_minutes)
+
+    def blocked(self, windows, days):
+        """Compile unavailability ``windows`` ({"day", "start", "end"} with "HH:MM"
+        times) into the sorted, merged (first slot, end slot) spans they touch.
+
+        Windows on days that are not scheduled or outside the day are dropped.
+        The result is hashable, so domains built from it are cached.
+        """
+        spans = set()
+        for window in windows:
+            day, start, end = parse_window(window)
+            if day not in days:
+                continue
+            d = days.index(day)
+            lo = max(self.slot(d, start), d * self.slots_per_day)
+            hi = min(self.slot_end(d, end), (d + 1) * self.slots_per_day)
+            if lo < hi:
+                spans.add((lo, hi))
+        merged = []
+        for lo, hi in sorted(spans):
+            if merged and lo <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+            else:
+                merged.append((lo, hi))
+        return tuple(merged)
+
+    def _day_intervals(self, length, day, blocked=()):
+        base = day * self.slots_per_day
+        intervals = [[base, base + self.slots_per_day - length]]
+        for lo, hi in blocked:
+            # Starts whose session would touch [lo, hi)
+            cut_lo, cut_hi = lo - length + 1, hi - 1
+            kept = []
+            for first, last in intervals:
+                if cut_hi < first or last < cut_lo:
+                    kept.append([first, last])
+                    continue
+                if first < cut_lo:
+                    kept.append([first, cut_lo - 1])
+                if cut_hi < last:
+                    kept.append([cut_hi + 1, last])
+            intervals = kept
+        return [iv for iv in intervals if iv[0] <= iv[1]]
+
+    def fits(self, length, day, blocked=()):
+        """Whether a session of ``length`` slots can start anywhere on ``day``."""
+        return bool(self._day_intervals(length, day, blocked))
+
+    def free_slots(self, day, blocked=()):
+        """Slots of ``day`` outside the ``blocked`` spans."""
+        base = day * self.slots_per_day
+        taken = set()
+        for lo, hi in blocked:
+            taken.update(range(max(lo, base), min(hi, base + self.slots_per_day)))
+        return self.slots_per_day - len(taken)
+
+    def day_starts(self, length, day, blocked=()):
+        """Domain of the starts on ``day`` that fit a session of ``length`` slots in that
+        day without touching a ``blocked`` span."""
+        key = (length, day, blocked)
+        if key not in self._starts:
+            self._starts[key] = cp_model.Domain.FromIntervals(self._day_intervals(length, day, blocked))
+        return self._starts[key]
+
+    def start_domain(self, length, *blocked):
+        """Domain of the starts, on any day, that fit a session of ``length`` slots.
+
+        With several ``blocked`` span sets (e.g. one per candidate room) a
+        start only needs to avoid the spans of one of them.
+        """
+        blocked = blocked or ((),)
+        key = (length, None, blocked)
+        if key not in self._starts:
+            self._starts[key] = cp_model.Domain.FromIntervals(
+                [iv for spans in blocked for day in range(self.n_days)
+                 for iv in self._day_intervals(length, day, spans)])
+        return self._starts[key]
+
+    def slot(self, day, minute):
+        """Slot containing ``minute`` (minutes since midnight) of ``day``."""
+        return day * self.slots_per_day + (minute - self.day_start) // self.slot_minutes
+
+    def slot_end(self, day, minute):
+        """First slot at or after ``minute`` of ``day``; the exclusive end of a span."""
+        return day * self.slots_per_day - (-(minute - self.day_start) // self.slot_minutes)
+
+    def offset(self, minute):
+        """Slot of the day that ``minute`` falls in."""
+        return (minute - self.day_start) // self.slot_minutes
+
+    def minute(self, slot):
+        """Start of ``slot`` in minutes since midnight of its day."""
+        return self.day_start + slot % self.slots_per_day * self.slot_minutes
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, Optional
 
 class Course(BaseModel):
     courseCode: Optional[str] = Field(None, description="Course code is taken from URL if not provided")
@@ -9,6 +9,10 @@ class Course(BaseModel):
     unitsLab: int
     yearLevel: int
     blocks: int
+    lectureMinutes: Optional[int] = Field(None, gt=0, description="Lecture session length; defaults to the time settings")
+    labMinutes: Optional[int] = Field(None, gt=0, description="Lab session length; defaults to the time settings")
+    enrollment: Optional[int] = Field(None, ge=0, description="Students per block; 0 or unset fits any room")
+    blockEnrollment: Dict[str, int] = Field(default_factory=dict, description="Students by block letter, overriding enrollment")
 
     class Config:
         allow_population_by_field_name = True
@@ -27,6 +31,10 @@ class Course(BaseModel):
 class CoursesPayload(BaseModel): 
     courses: list[Course]
 
+class BulkCourseRequest(BaseModel):
+    upserts: list[Course] = []
+    deletes: list[str] = []
+
 class FinalSchedule(BaseModel):
     schedule_name: str
     schedule: list[dict]
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from app.models.settings import TimeWindow
 
 class Faculty(BaseModel):
     id: Optional[int] = None
@@ -11,6 +12,8 @@ class Faculty(BaseModel):
     Sex: Optional[str] = None
     Status: Optional[str] = None
     units: float = 0.0
+    max_units: Optional[float] = None
+    unavailable: List[TimeWindow] = []
 
 class AssignmentRequest(BaseModel):
     schedule_id: int
@@ -19,4 +22,8 @@ class AssignmentRequest(BaseModel):
 class GroupUnassignmentRequest(BaseModel):
     courseCode: str
     program: str
-    block: str
\ No newline at end of file
+    block: str
+
+class BulkFacultyRequest(BaseModel):
+    upserts: List[Faculty] = []
+    deletes: List[int] = []
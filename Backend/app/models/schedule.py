@@ -1,8 +1,16 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class OverrideRequest(BaseModel):
     schedule_id: int
     new_start: str  
     new_room: str
     new_day: Optional[str] = None
+
+class BatchOverrideRequest(BaseModel):
+    overrides: List[OverrideRequest]
+
+class ResolveRequest(BaseModel):
+    added: List[str] = []
+    changed: List[str] = []
+    removed: List[str] = []
@@ -1,13 +1,23 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Dict, List
+
+class TimeWindow(BaseModel):
+    day: str
+    start: str = Field(..., pattern=r"^\d{1,2}:\d{2}$", description="24-hour HH:MM")
+    end: str = Field(..., pattern=r"^\d{1,2}:\d{2}$", description="24-hour HH:MM")
 
 class RoomData(BaseModel):
     lecture: List[str]
     lab: List[str]
+    unavailable: Dict[str, List[TimeWindow]] = Field(default_factory=dict, description="Blocked windows per room name")
+    capacity: Dict[str, int] = Field(default_factory=dict, description="Seats per room name; rooms without one seat any block")
 
 class DaysSettings(BaseModel):
     days: List[str]
 
 class TimeSettings(BaseModel):
     start_time: int
-    end_time: int
\ No newline at end of file
+    end_time: int
+    slot_minutes: int = Field(30, gt=0, le=180)
+    lecture_minutes: int = Field(60, gt=0)
+    lab_minutes: int = Field(90, gt=0)
\ No newline at end of file
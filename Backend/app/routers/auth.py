@@ -1,9 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from app.models.auth import LoginRequest, LoginResponse
-from app.core.auth import create_access_token
-from app.core.firebase import db
+from app.core.auth import create_access_token, verify_password, hash_password_async
+from app.core.firebase import db, run_db, admins_cache, admin_index
 import logging
-from google.cloud.firestore_v1 import FieldFilter
 
 logger = logging.getLogger("auth")
 router = APIRouter()
@@ -11,21 +10,23 @@ router = APIRouter()
 @router.post("/login", response_model=LoginResponse)
 async def login(login_req: LoginRequest):
     try:
-        admins_ref = db.collection("admins")
-        admin_docs = admins_ref.where(filter=FieldFilter("email", "==", login_req.email)).stream()
-        admin = None
-        for doc in admin_docs:
-            admin = doc.to_dict()
-            break
+        doc_id, admin = admin_index().get(login_req.email, (None, None))
+        ok, needs_rehash = await verify_password(login_req.password, admin and admin.get("password"))
 
         if not admin:
             logger.warning("Login failed: Admin not found")
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        if admin.get("password") != login_req.password:
+        if not ok:
             logger.warning("Login failed: Password mismatch")
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
+        if needs_rehash:
+            hashed = await hash_password_async(login_req.password)
+            await run_db(db.collection("admins").document(doc_id).update, {"password": hashed})
+            admins_cache.put(doc_id, {**admin, "password": hashed})
+            logger.info("Migrated plaintext password to bcrypt for %s", login_req.email)
+
         access_token = create_access_token({"email": login_req.email})
         return LoginResponse(access_token=access_token)
     except HTTPException as he:
@@ -1,9 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.core.auth import verify_token_allowed
-from app.core.firebase import db, refresh_courses_cache, load_courses
-from app.models.course import Course
+from app.core.firebase import db, run_db, courses_cache, load_courses, commit_batched, get_docs
+from app.models.course import Course, BulkCourseRequest
 import logging
-from google.cloud.firestore_v1 import FieldFilter
 
 logger = logging.getLogger("courses")
 router = APIRouter(dependencies=[Depends(verify_token_allowed)])
@@ -11,11 +10,11 @@ router = APIRouter(dependencies=[Depends(verify_token_allowed)])
 @router.post("/add")      
 async def add_course(course: Course):
     try:
-        refresh_courses_cache()
-        courses_ref = db.collection("courses")
-        if any(courses_ref.where(filter=FieldFilter("courseCode", "==", course.courseCode)).stream()):
+        if courses_cache.get(course.courseCode) is not None:
             raise HTTPException(status_code=400, detail="Course exists")
-        courses_ref.document(course.courseCode).set(course.dict(by_alias=True))
+        course_data = course.dict(by_alias=True)
+        await run_db(db.collection("courses").document(course.courseCode).set, course_data)
+        courses_cache.put(course.courseCode, course_data)
         return {"status": "success", "message": "Course added"}
     except HTTPException as he:
         logger.error(f"HTTP error in add_course: {he.detail}")
@@ -27,17 +26,16 @@ async def add_course(course: Course):
 @router.put("/update/{course_code}")
 async def update_course(course_code: str, course: Course):
     try:
-        course_data = course.dict(by_alias=True)
+        course_data = course.dict(by_alias=True, exclude_unset=True)
         if not course_data.get("courseCode"):
             course_data["courseCode"] = course_code
 
-        courses_ref = db.collection("courses").document(course_code)
-        doc = courses_ref.get()
-        if not doc.exists:
+        existing_data = courses_cache.get(course_code)
+        if existing_data is None:
             raise HTTPException(status_code=404, detail="Course not found")
 
-        courses_ref.update(course_data)
-        refresh_courses_cache()
+        await run_db(db.collection("courses").document(course_code).update, course_data)
+        courses_cache.put(course_code, {**existing_data, **course_data})
         return {"status": "success", "message": f"Course {course_code} updated successfully."}
     except HTTPException as he:
         logger.error(f"HTTP error in update_course: {he.detail}")
@@ -49,20 +47,19 @@ async def update_course(course_code: str, course: Course):
 @router.delete("/delete/{course_code}")
 async def delete_course(course_code: str):
     try:
-        courses_ref = db.collection("courses").document(course_code)
-        doc = courses_ref.get()
-        if not doc.exists:
+        course_data = courses_cache.get(course_code)
+        if course_data is None:
             raise HTTPException(status_code=404, detail="Course not found")
 
-        course_data = doc.to_dict()
+        courses_ref = db.collection("courses").document(course_code)
         archived_courses_ref = db.collection("archived_courses").document(course_code)
 
         batch = db.batch()
         batch.set(archived_courses_ref, course_data)
         batch.delete(courses_ref)
-        batch.commit()
+        await run_db(batch.commit)
 
-        refresh_courses_cache()
+        courses_cache.delete(course_code)
         return {"status": "success", "message": f"Course {course_code} archived and deleted from active courses."}
     except HTTPException as he:
         logger.error(f"HTTP error in delete_course: {he.detail}")
@@ -79,3 +76,48 @@ async def list_courses():
     except Exception as e:
         logger.exception("Unexpected error in list_courses")
         raise HTTPException(status_code=500, detail="Internal Server Error in list_courses")
+
+@router.post("/bulk")
+async def bulk_courses(request: BulkCourseRequest):
+    """Upsert and archive-delete many courses with batched reads and writes"""
+    try:
+        missing_code = [i for i, course in enumerate(request.upserts) if not course.courseCode]
+        if missing_code:
+            raise HTTPException(status_code=400, detail=f"courseCode is required (upserts {missing_code})")
+        upserts = {course.courseCode: course for course in request.upserts}
+        both = set(upserts) & set(request.deletes)
+        if both:
+            raise HTTPException(status_code=400, detail=f"Courses both upserted and deleted: {sorted(both)}")
+
+        courses_ref = db.collection("courses")
+        existing = await get_docs([courses_ref.document(code) for code in [*upserts, *request.deletes]])
+
+        docs, created, updated = {}, [], []
+        for code, course in upserts.items():
+            if existing.get(code):
+                # Fields left out keep their stored values
+                docs[code] = {**existing[code], **course.dict(by_alias=True, exclude_unset=True)}
+                updated.append(code)
+            else:
+                docs[code] = course.dict(by_alias=True)
+                created.append(code)
+        deleted = [code for code in dict.fromkeys(request.deletes) if existing.get(code)]
+        not_found = [code for code in dict.fromkeys(request.deletes) if not existing.get(code)]
+
+        writes = [("set", courses_ref.document(code), data) for code, data in docs.items()]
+        writes += [[
+            ("set", db.collection("archived_courses").document(code), existing[code]),
+            ("delete", courses_ref.document(code)),
+        ] for code in deleted]
+        await commit_batched(writes)
+
+        courses_cache.put_many(docs)
+        courses_cache.delete_many(deleted)
+        logger.info("Bulk courses: %d created, %d updated, %d deleted", len(created), len(updated), len(deleted))
+        return {"status": "success", "created": created, "updated": updated, "deleted": deleted, "not_found": not_found}
+    except HTTPException as he:
+        logger.error(f"HTTP error in bulk_courses: {he.detail}")
+        raise he
+    except Exception as e:
+        logger.exception("Unexpected error in bulk_courses")
+        raise HTTPException(status_code=500, detail="Internal Server Error in bulk_courses")
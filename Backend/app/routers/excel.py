@@ -1,34 +1,120 @@
 from fastapi import APIRouter, File, UploadFile, Depends, HTTPException
+import asyncio
 import pandas as pd
 import io
 from app.core.auth import verify_token_allowed
-from app.utils.helper import get_value
+from app.core.firebase import db, courses_cache, commit_batched
 import logging
 
 logger = logging.getLogger("excel")
 router = APIRouter(dependencies=[Depends(verify_token_allowed)])
- 
+
+# Normalized header (lowercase, no spaces/underscores) -> course field
+COLUMN_ALIASES = {
+    "coursecode": "courseCode",
+    "title": "title",
+    "coursetitle": "title",
+    "program": "program",
+    "unitslecture": "unitsLecture",
+    "lectureunits": "unitsLecture",
+    "unitslab": "unitsLab",
+    "labunits": "unitsLab",
+    "yearlevel": "yearLevel",
+    "year": "yearLevel",
+    "blocks": "blocks",
+}
+TEXT_FIELDS = ("courseCode", "title", "program")
+NUMBER_FIELDS = ("unitsLecture", "unitsLab", "yearLevel", "blocks")
+# Blocks of a new course whose row leaves them blank
+DEFAULT_BLOCKS = 1
+
+
+def _normalize_columns(df):
+    renamed = {}
+    for column in df.columns:
+        field = COLUMN_ALIASES.get("".join(str(column).split()).replace("_", "").lower())
+        if field and field not in renamed.values():
+            renamed[column] = field
+    return df[list(renamed)].rename(columns=renamed)
+
+
+def parse_courses(df):
+    """Validate a course sheet column by column.
+
+    Returns (courses, errors, columns): the valid rows as course dicts, one
+    ``{"row", "courseCode", "errors"}`` entry per rejected row (row is the
+    1-based sheet row, header included) and the course fields the sheet had.
+    Missing numbers default to 0, as before, except blocks: a course whose
+    row has none is returned without ``blocks``.
+    """
+    df = _normalize_columns(df).reset_index(drop=True)
+    empty = pd.Series([pd.NA] * len(df), dtype="object")
+    checks = []
+    parsed = {}
+
+    for field in TEXT_FIELDS:
+        raw = df[field] if field in df else empty
+        text = raw.astype("string").str.strip()
+        missing = text.isna() | (text == "")
+        checks.append((missing, f"{field} is required"))
+        parsed[field] = text
+
+    for field in NUMBER_FIELDS:
+        raw = df[field] if field in df else empty
+        number = pd.to_numeric(raw, errors="coerce")
+        bad = raw.notna() & (number.isna() | (number % 1 != 0) | (number < 0))
+        checks.append((bad, f"{field} must be a whole number >= 0"))
+        number = number.where(~bad, 0)
+        parsed[field] = number.astype("Int64") if field == "blocks" else number.fillna(0).astype(int)
+
+    codes = parsed["courseCode"]
+    checks.append((codes.notna() & codes.duplicated(keep=False), "duplicate courseCode in sheet"))
+
+    problems = {}
+    for mask, message in checks:
+        for i in mask.fillna(False).to_numpy().nonzero()[0]:
+            problems.setdefault(int(i), []).append(message)
+
+    table = pd.DataFrame(parsed).astype(object)
+    valid = ~table.index.isin(list(problems))
+    courses = [{name: value for name, value in row.items() if pd.notna(value)}
+               for row in table[valid].to_dict("records")]
+    errors = [
+        {"row": i + 2, "courseCode": None if pd.isna(codes[i]) else codes[i], "errors": messages}
+        for i, messages in sorted(problems.items())
+    ]
+    return courses, errors, set(df.columns)
+
+
+def _read_sheet(contents):
+    return parse_courses(pd.read_excel(io.BytesIO(contents)))
+
+
 @router.post("/")
-async def upload_excel(file: UploadFile = File(...)):
+async def upload_excel(file: UploadFile = File(...), commit: bool = False):
+    """Parse a course catalog sheet; with commit=true also upsert every valid row"""
     try:
         if not file.filename.endswith((".xlsx", ".xls")):
             raise HTTPException(status_code=400, detail="Invalid file format. Please upload an Excel file.")
-    
+
         contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        courses = []
-        for index, row in df.iterrows():
-            course = {
-                "courseCode": get_value(row, ["Course Code", "CourseCode"]),
-                "title": get_value(row, ["Title"]),
-                "program": get_value(row, ["Program"]),
-                "unitsLecture": int(get_value(row, ["Units Lecture", "Lecture Units"], 0)),
-                "unitsLab": int(get_value(row, ["Units Lab", "Lab Units"], 0)),
-                "yearLevel": int(get_value(row, ["Year Level", "Year"], 0)),
-                "blocks": 0
-            }
-            courses.append(course)
-        return {"courses": courses}
+        courses, errors, _ = await asyncio.to_thread(_read_sheet, contents)
+        logger.info("Parsed %d valid and %d invalid course rows", len(courses), len(errors))
+        result = {"courses": courses, "errors": errors, "valid": len(courses), "invalid": len(errors)}
+        if not commit:
+            return result
+
+        docs = {}
+        for course in courses:
+            existing = courses_cache.get(course["courseCode"])
+            if "blocks" not in course:
+                # Keep the block count set in the app; a new course needs at least one block
+                course = {**course, "blocks": (existing or {}).get("blocks", DEFAULT_BLOCKS)}
+            docs[course["courseCode"]] = {**(existing or {}), **course}
+        await commit_batched([("set", db.collection("courses").document(code), data) for code, data in docs.items()])
+        courses_cache.put_many(docs)
+        logger.info("Upserted %d courses from %s", len(docs), file.filename)
+        return {**result, "committed": len(docs)}
     except HTTPException as he:
         logger.error(f"HTTP error in upload_excel: {he.detail}")
         raise he
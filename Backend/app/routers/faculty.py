@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 import random
 from app.core.auth import verify_token_allowed
-from app.core.firebase import db, refresh_faculty_cache, get_faculty
-from app.models.faculty import Faculty, AssignmentRequest, GroupUnassignmentRequest
-from app.core.globals import schedule_dict
+from app.core.firebase import db, run_db, faculty_cache, get_faculty, commit_batched, get_docs
+from app.models.faculty import Faculty, AssignmentRequest, GroupUnassignmentRequest, BulkFacultyRequest
+from app.core.globals import schedule_store
+from app.core.jobs import submit_assignment, get_job, job_info, JobQueueFull
+from app.core.assignment import DEFAULT_MAX_UNITS
+from app.utils.helper import window_overlaps
 import logging
 
 logger = logging.getLogger("faculty")
@@ -18,13 +21,30 @@ async def fetch_all_faculty():
         logger.exception("Unexpected error in fetch_all_faculty")
         raise HTTPException(status_code=500, detail="Internal Server Error in fetch_all_faculty")
 
+@router.get("/loads")
+async def fetch_faculty_loads():
+    """Scheduled hours per week of every faculty member, kept current with the schedule"""
+    try:
+        loads = schedule_store.faculty_loads()
+        faculty_loads = [{
+            "id": faculty.get("id"),
+            "name": faculty.get("name"),
+            "units": loads.pop(faculty.get("name"), 0.0),
+            "max_units": faculty.get("max_units"),
+        } for faculty in get_faculty()]
+        # Names on events that match no faculty document
+        return {"status": "success", "loads": faculty_loads, "unmatched": loads}
+    except Exception as e:
+        logger.exception("Unexpected error in fetch_faculty_loads")
+        raise HTTPException(status_code=500, detail="Internal Server Error in fetch_faculty_loads")
+
 @router.post("/add")
 async def add_faculty(faculty: Faculty):
     try:
-        refresh_faculty_cache()
         if faculty.id is None:
             faculty.id = random.randint(1, 1000000)
-        db.collection("faculty").document(str(faculty.id)).set(faculty.dict())
+        await run_db(db.collection("faculty").document(str(faculty.id)).set, faculty.dict())
+        faculty_cache.put(str(faculty.id), faculty.dict())
         return {"status": "success", "message": "Faculty added successfully.", "faculty": faculty.dict()}
     except Exception as e:
         logger.exception("Unexpected error in add_faculty")
@@ -33,16 +53,14 @@ async def add_faculty(faculty: Faculty):
 @router.put("/update/{faculty_id}")
 async def update_faculty(faculty_id: int, faculty: Faculty):
     try:
-        faculty_ref = db.collection("faculty").document(str(faculty_id))
-        doc = faculty_ref.get()
-        if not doc.exists:
+        existing_data = faculty_cache.get(str(faculty_id))
+        if existing_data is None:
             raise HTTPException(status_code=404, detail="Faculty not found")
     
-        existing_data = doc.to_dict()
         updated_data = {**existing_data, **faculty.dict(exclude_unset=True)}
         updated_data["id"] = existing_data.get("id", faculty_id)
-        faculty_ref.update(updated_data)
-        refresh_faculty_cache()
+        await run_db(db.collection("faculty").document(str(faculty_id)).update, updated_data)
+        faculty_cache.put(str(faculty_id), updated_data)
         return {"status": "success", "message": f"Faculty {faculty_id} updated successfully.", "faculty": updated_data}
     except HTTPException as he:
         logger.error(f"HTTP error in update_faculty: {he.detail}")
@@ -54,24 +72,21 @@ async def update_faculty(faculty_id: int, faculty: Faculty):
 @router.delete("/delete/{faculty_id}")
 async def delete_faculty(faculty_id: int):
     try:
-        refresh_faculty_cache()
-        faculty_ref = db.collection("faculty").document(str(faculty_id))
-        doc = faculty_ref.get()
-    
-        if not doc.exists:
+        faculty_data = faculty_cache.get(str(faculty_id))
+        if faculty_data is None:
             raise HTTPException(status_code=404, detail="Faculty not found")
     
-        faculty_data = doc.to_dict()
+        faculty_ref = db.collection("faculty").document(str(faculty_id))
         archived_faculty_ref = db.collection("archived_faculty").document(str(faculty_id))
     
         batch = db.batch()
         batch.set(archived_faculty_ref, faculty_data)
         batch.delete(faculty_ref)
-        batch.commit()
+        await run_db(batch.commit)
+        faculty_cache.delete(str(faculty_id))
     
-        for event in schedule_dict.values():
-            if event.get("faculty") == faculty_data.get("name", ""):
-                event["faculty"] = ""
+        for event in schedule_store.by_faculty(faculty_data.get("name", "")):
+            schedule_store.update(event["schedule_id"], {"faculty": ""})
     
         return {"status": "success", "message": f"Faculty {faculty_id} archived and deleted from active faculty."}
     except HTTPException as he:
@@ -81,9 +96,64 @@ async def delete_faculty(faculty_id: int):
         logger.exception("Unexpected error in delete_faculty")
         raise HTTPException(status_code=500, detail="Internal Server Error in delete_faculty")
 
+@router.post("/bulk")
+async def bulk_faculty(request: BulkFacultyRequest):
+    """Upsert and archive-delete many faculty with batched reads and writes"""
+    try:
+        for faculty in request.upserts:
+            if faculty.id is None:
+                faculty.id = random.randint(1, 1000000)
+        upserts = {str(faculty.id): faculty for faculty in request.upserts}
+        deletes = list(dict.fromkeys(str(faculty_id) for faculty_id in request.deletes))
+        both = set(upserts) & set(deletes)
+        if both:
+            raise HTTPException(status_code=400, detail=f"Faculty both upserted and deleted: {sorted(both)}")
+
+        faculty_ref = db.collection("faculty")
+        existing = await get_docs([faculty_ref.document(doc_id) for doc_id in [*upserts, *deletes]])
+
+        docs, created, updated = {}, [], []
+        for doc_id, faculty in upserts.items():
+            if existing.get(doc_id):
+                docs[doc_id] = {**existing[doc_id], **faculty.dict(exclude_unset=True)}
+                docs[doc_id]["id"] = existing[doc_id].get("id", faculty.id)
+                updated.append(faculty.id)
+            else:
+                docs[doc_id] = faculty.dict()
+                created.append(faculty.id)
+        deleted = [doc_id for doc_id in deletes if existing.get(doc_id)]
+        not_found = [int(doc_id) for doc_id in deletes if not existing.get(doc_id)]
+
+        writes = [("set", faculty_ref.document(doc_id), data) for doc_id, data in docs.items()]
+        writes += [[
+            ("set", db.collection("archived_faculty").document(doc_id), existing[doc_id]),
+            ("delete", faculty_ref.document(doc_id)),
+        ] for doc_id in deleted]
+        await commit_batched(writes)
+
+        faculty_cache.put_many(docs)
+        faculty_cache.delete_many(deleted)
+        for doc_id in deleted:
+            for event in schedule_store.by_faculty(existing[doc_id].get("name", "")):
+                schedule_store.update(event["schedule_id"], {"faculty": ""})
+        logger.info("Bulk faculty: %d created, %d updated, %d deleted", len(created), len(updated), len(deleted))
+        return {
+            "status": "success",
+            "created": created,
+            "updated": updated,
+            "deleted": [int(doc_id) for doc_id in deleted],
+            "not_found": not_found
+        }
+    except HTTPException as he:
+        logger.error(f"HTTP error in bulk_faculty: {he.detail}")
+        raise he
+    except Exception as e:
+        logger.exception("Unexpected error in bulk_faculty")
+        raise HTTPException(status_code=500, detail="Internal Server Error in bulk_faculty")
+
 @router.post("/assign")
 async def assign_faculty(request: AssignmentRequest):
-    event = schedule_dict.get(request.schedule_id)
+    event = schedule_store.get(request.schedule_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
@@ -91,23 +161,24 @@ async def assign_faculty(request: AssignmentRequest):
     if not faculty:
         raise HTTPException(status_code=404, detail="Faculty not found")
 
-    group_key = (event["courseCode"], event["program"], event["block"])
-    group_events = [e for e in schedule_dict.values() if 
-                    (e["courseCode"], e["program"], e["block"]) == group_key]
-    assigned_events = [e for e in schedule_dict.values() if e.get("faculty") == faculty["name"]]
+    group_events = schedule_store.group(event["courseCode"], event["program"], event["block"])
+    group_ids = {ge["schedule_id"] for ge in group_events}
 
     for ge in group_events:
-        for ae in assigned_events:
-            if ae["day"] != ge["day"]:
-                continue
-            if ge["start"] < ae["end"] and ae["start"] < ge["end"]:
+        window = window_overlaps(faculty.get("unavailable"), ge["day"], ge["start"], ge["end"])
+        if window:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{faculty['name']} is unavailable on {ge['day']} {window['start']}-{window['end']}"
+            )
+        for ae in schedule_store.faculty_overlaps(faculty["name"], ge["day"], ge["start"], ge["end"]):
+            if ae["schedule_id"] not in group_ids:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Conflict on {ge['day']} for event {ae['schedule_id']}"
                 )
 
-    for ge in group_events:
-        ge["faculty"] = faculty["name"]
+    group_events = [schedule_store.update(ge["schedule_id"], {"faculty": faculty["name"]}) for ge in group_events]
 
     return {
         "status": "success",
@@ -118,16 +189,10 @@ async def assign_faculty(request: AssignmentRequest):
 @router.post("/unassign")
 async def unassign_faculty_group(request: GroupUnassignmentRequest):
     try:
-        group_events = [
-            e for e in schedule_dict.values()
-            if e.get("courseCode") == request.courseCode and 
-               e.get("program") == request.program and 
-               e.get("block") == request.block
-        ]
+        group_events = schedule_store.group(request.courseCode, request.program, request.block)
         if not group_events:
             raise HTTPException(status_code=404, detail="No matching events found for the provided group parameters")
-        for e in group_events:
-            e["faculty"] = ""
+        group_events = [schedule_store.update(e["schedule_id"], {"faculty": ""}) for e in group_events]
         return {"status": "success", "message": "Faculty unassigned from group", "events": group_events}
     except HTTPException as he:
         logger.error(f"HTTP error in unassign_faculty_group: {he.detail}")
@@ -135,3 +200,36 @@ async def unassign_faculty_group(request: GroupUnassignmentRequest):
     except Exception as e:
         logger.exception("Unexpected error in unassign_faculty_group")
         raise HTTPException(status_code=500, detail="Internal Server Error in unassign_faculty_group")
+
+@router.post("/auto-assign")
+async def auto_assign_faculty(keep_existing: bool = True,
+                              dry_run: bool = False,
+                              default_max_units: float = DEFAULT_MAX_UNITS,
+                              max_time: float = Query(5, gt=0, le=120),
+                              wait: bool = False):
+    """Assign faculty to every course group of the schedule as a background job.
+
+    Progress streams from /progress/{process_id}; the outcome is at
+    /faculty/auto-assign/{process_id}, or in the response with wait=true.
+    """
+    if not schedule_store:
+        raise HTTPException(status_code=400, detail="No schedule to assign faculty to; generate one first")
+    try:
+        job = submit_assignment(keep_existing=keep_existing, dry_run=dry_run,
+                                default_max_units=default_max_units, max_time=max_time)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    logger.info("Started faculty auto-assignment process_id=%s", job["id"])
+    if not wait:
+        return {"status": "started", "process_id": job["id"]}
+    result = await job["done"]
+    if result is None:
+        raise HTTPException(status_code=409, detail=f"Auto-assignment {job['status']}")
+    return {"status": "success", "process_id": job["id"], **result}
+
+@router.get("/auto-assign/{job_id}")
+async def get_auto_assignment(job_id: str):
+    job = get_job(job_id)
+    if job is None or job["kind"] != "assignment":
+        raise HTTPException(status_code=404, detail="Auto-assignment job not found")
+    return {"status": "success", "job": job_info(job), "result": job["result"]}
@@ -1,52 +1,182 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.core.auth import verify_token_allowed
-from app.core.firebase import get_start_end
-from app.utils.helper import format_period
-from app.core.globals import schedule_dict
-from app.models.schedule import OverrideRequest
+from app.utils.helper import format_period, window_overlaps
+from app.core.firebase import load_rooms, faculty_unavailable, courses_cache
+from app.core.rooms import block_enrollment, fits
+from app.core.globals import schedule_store
+from app.core.timegrid import DEFAULT_LECTURE_MINUTES, DEFAULT_LAB_MINUTES
+from app.models.schedule import OverrideRequest, BatchOverrideRequest
 import logging
 
 logger = logging.getLogger("override")
 router = APIRouter(dependencies=[Depends(verify_token_allowed)])
 
+
+def _plan(request: OverrideRequest):
+    """Resolve an override into its event and the new day/period/room span."""
+    event = schedule_store.get(request.schedule_id)
+    if not event:
+        raise HTTPException(status_code=404, detail=f"Event {request.schedule_id} not found")
+
+    # Moving an event keeps its length; older events without times fall back to the defaults
+    if event.get("start") is not None and event.get("end") is not None:
+        duration = event["end"] - event["start"]
+    else:
+        duration = DEFAULT_LAB_MINUTES if event["session"] == "Laboratory" else DEFAULT_LECTURE_MINUTES
+    try:
+        parts = request.new_start.split(":")
+        new_start_minutes = int(parts[0]) * 60 + int(parts[1])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid time format")
+
+    new_day = request.new_day if request.new_day and request.new_day.lower() != "auto" else event.get("day")
+    return {
+        "event": event,
+        "day": new_day,
+        "room": request.new_room,
+        "start": new_start_minutes,
+        "end": new_start_minutes + duration,
+        "period": format_period(request.new_start, duration),
+    }
+
+
+def _conflict(kind, plan, other):
+    return {
+        "type": kind,
+        "schedule_id": plan["event"]["schedule_id"],
+        "conflicts_with": other["schedule_id"],
+        "day": plan["day"],
+        "period": other["period"],
+    }
+
+
+def _store_conflicts(plan, moving):
+    """Section, room and faculty clashes with events not being moved."""
+    event, day, start, end = plan["event"], plan["day"], plan["start"], plan["end"]
+    checks = [
+        ("section", schedule_store.section_overlaps(event.get("program"), event.get("year"), event.get("block"),
+                                                    day, start, end)),
+        ("room", schedule_store.room_overlaps(plan["room"], day, start, end)),
+    ]
+    if event.get("faculty"):
+        checks.append(("faculty", schedule_store.faculty_overlaps(event["faculty"], day, start, end)))
+    return [
+        _conflict(kind, plan, other)
+        for kind, overlaps in checks
+        for other in overlaps
+        if other["schedule_id"] not in moving
+    ]
+
+
+def _availability_conflicts(plan, room_windows, faculty_windows):
+    """The new room's or the event's faculty's unavailability windows hit by the move."""
+    event, day, start, end = plan["event"], plan["day"], plan["start"], plan["end"]
+    conflicts = []
+    for kind, windows in (("room_unavailable", room_windows.get(plan["room"])),
+                          ("faculty_unavailable", faculty_windows.get(event.get("faculty")))):
+        window = window_overlaps(windows, day, start, end)
+        if window:
+            conflicts.append({
+                "type": kind,
+                "schedule_id": event["schedule_id"],
+                "conflicts_with": None,
+                "day": day,
+                "period": f"{window['start']} - {window['end']}",
+            })
+    return conflicts
+
+
+def _capacity_conflicts(plan, rooms):
+    """The new room when it is too small for the event's block."""
+    event = plan["event"]
+    course = courses_cache.get(event.get("courseCode")) or {}
+    if fits(rooms, plan["room"], block_enrollment(course, event.get("block"))):
+        return []
+    return [{
+        "type": "room_capacity",
+        "schedule_id": event["schedule_id"],
+        "conflicts_with": None,
+        "day": plan["day"],
+        "period": plan["period"],
+    }]
+
+
+def _batch_conflicts(plans):
+    """Clashes between the new positions of events moved in the same batch."""
+    conflicts = []
+    ordered = sorted(plans, key=lambda p: (str(p["day"]), p["start"]))
+    for i, a in enumerate(ordered):
+        for b in ordered[i + 1:]:
+            if b["day"] != a["day"] or b["start"] >= a["end"]:
+                break
+            ea, eb = a["event"], b["event"]
+            if (ea.get("program"), ea.get("year"), ea.get("block")) == (eb.get("program"), eb.get("year"), eb.get("block")):
+                conflicts.append(_conflict("section", a, {**eb, "period": b["period"]}))
+            if a["room"] == b["room"]:
+                conflicts.append(_conflict("room", a, {**eb, "period": b["period"]}))
+            if ea.get("faculty") and ea.get("faculty") == eb.get("faculty"):
+                conflicts.append(_conflict("faculty", a, {**eb, "period": b["period"]}))
+    return conflicts
+
+
+def _apply(plan):
+    return schedule_store.update(plan["event"]["schedule_id"], {
+        "period": plan["period"],
+        "room": plan["room"],
+        "day": plan["day"],
+    })
+
+
 @router.post("/event")
 async def override_event(request: OverrideRequest):
     try:
-        event = schedule_dict.get(request.schedule_id)
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
-    
-        fixed_duration = 90 if event["session"] == "Laboratory" else 60
-        try:
-            parts = request.new_start.split(":")
-            new_start_minutes = int(parts[0]) * 60 + int(parts[1])
-        except Exception:
-            raise HTTPException(status_code=400, detail="Invalid time format")
-    
-        new_end_minutes = new_start_minutes + fixed_duration
-        new_day = request.new_day if request.new_day and request.new_day.lower() != "auto" else event.get("day")
-    
-        for e in schedule_dict.values():
-            if e["schedule_id"] == request.schedule_id:
-                continue
-            if (e.get("program") == event.get("program") and 
-                e.get("block") == event.get("block") and 
-                e.get("year") == event.get("year") and 
-                e.get("day") == new_day):
-                e_start, e_end = get_start_end(e["period"])
-                if not (new_end_minutes <= e_start or new_start_minutes >= e_end):
-                    raise HTTPException(status_code=400, detail=f"Override causes conflict with event {e['schedule_id']} on {new_day}")
-    
-        new_period = format_period(request.new_start, fixed_duration)
-        event["period"] = new_period
-        event["room"] = request.new_room
-        event["day"] = new_day
-        schedule_dict[request.schedule_id] = event
-    
-        return {"status": "success", "event": event}
+        plan = _plan(request)
+        conflicts = _store_conflicts(plan, {request.schedule_id})
+        rooms = load_rooms()
+        conflicts.extend(_availability_conflicts(plan, rooms.get("unavailable") or {}, faculty_unavailable()))
+        conflicts.extend(_capacity_conflicts(plan, rooms))
+        if conflicts:
+            raise HTTPException(status_code=400, detail={
+                "message": f"Override causes {len(conflicts)} conflict(s) on {plan['day']}",
+                "conflicts": conflicts,
+            })
+
+        return {"status": "success", "event": _apply(plan)}
     except HTTPException as he:
         logger.error(f"HTTP error in override_event: {he.detail}")
         raise he
     except Exception as e:
         logger.exception("Unexpected error in override_event")
         raise HTTPException(status_code=500, detail="Internal Server Error in override_event")
+
+
+@router.post("/batch")
+async def override_batch(request: BatchOverrideRequest):
+    """Validate every override against the schedule and each other, then apply all or none"""
+    try:
+        moving = [o.schedule_id for o in request.overrides]
+        if len(set(moving)) != len(moving):
+            raise HTTPException(status_code=400, detail="Each event may appear only once per batch")
+
+        plans = [_plan(o) for o in request.overrides]
+        moving = set(moving)
+        conflicts = [c for plan in plans for c in _store_conflicts(plan, moving)]
+        rooms = load_rooms()
+        room_windows, faculty_windows = rooms.get("unavailable") or {}, faculty_unavailable()
+        conflicts.extend(c for plan in plans for c in _availability_conflicts(plan, room_windows, faculty_windows))
+        conflicts.extend(c for plan in plans for c in _capacity_conflicts(plan, rooms))
+        conflicts.extend(_batch_conflicts(plans))
+        if conflicts:
+            raise HTTPException(status_code=400, detail={
+                "message": f"Batch causes {len(conflicts)} conflict(s); nothing was applied",
+                "conflicts": conflicts,
+            })
+
+        events = [_apply(plan) for plan in plans]
+        return {"status": "success", "events": events}
+    except HTTPException as he:
+        logger.error(f"HTTP error in override_batch: {he.detail}")
+        raise he
+    except Exception as e:
+        logger.exception("Unexpected error in override_batch")
+        raise HTTPException(status_code=500, detail="Internal Server Error in override_batch")
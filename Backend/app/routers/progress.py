@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from app.core.globals import progress_state
-import asyncio
+from app.core.progress import subscribe, unsubscribe, solver_stats
+import json
 from fastapi.responses import StreamingResponse
 
 router = APIRouter()
@@ -8,26 +9,22 @@ router = APIRouter()
 @router.get("/progress/{process_id}")
 async def progress_stream(process_id: str):
     async def event_generator():
-        retry_count = 0
-        max_retries = 3
-        
-        while retry_count < max_retries:
-            try:
-                while True:
-                    progress_value = progress_state.get(process_id, 0)
-                    if progress_value == -1:  # Error state
-                        yield f"data: error\n\n"
-                        break
-                    yield f"data: {progress_value}\n\n"
-                    if progress_value >= 100:
-                        break
-                    await asyncio.sleep(1)
-                break  # Successful completion
-            except Exception as e:
-                retry_count += 1
-                if retry_count >= max_retries:
-                    yield f"data: connection_error\n\n"
+        queue = subscribe(process_id)
+        try:
+            # Current state first (unknown or evicted ids end as errors),
+            # then whatever the solver pushes
+            value, stats = progress_state.get(process_id, -1), solver_stats.get(process_id)
+            while True:
+                if stats is not None:
+                    yield f"event: solver\ndata: {json.dumps(stats)}\n\n"
+                if value == -1:  # Error state
+                    yield f"data: error\n\n"
                     break
-                await asyncio.sleep(1)  # Wait before retry
-    
+                yield f"data: {value}\n\n"
+                if value >= 100:
+                    break
+                value, stats = await queue.get()
+        finally:
+            unsubscribe(process_id, queue)
+
     return StreamingResponse(event_generator(), media_type="text/event-stream")
@@ -1,35 +1,198 @@
-from fastapi import APIRouter, HTTPException, Response, Depends, BackgroundTasks
-import uuid
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Response, Request, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.core.auth import verify_token_allowed
-from app.core.scheduler import generate_schedule
-from app.core.firebase import db, load_rooms
-from app.core.globals import schedule_dict, progress_state
+from app.core.jobs import submit_generation, cancel_job, accept_job, get_job, job_info, JobQueueFull
+from app.core.solver import DEFAULT_WEIGHTS, DEFAULT_LATE_AFTER
+from app.core.firebase import db, run_db, load_rooms, rooms_cache
+from app.core.globals import schedule_store, progress_state
+from app.models.schedule import ResolveRequest
 import logging
 
 logger = logging.getLogger("schedule")
 router = APIRouter(dependencies=[Depends(verify_token_allowed)])
 
+NDJSON_CHUNK_SIZE = 500
+
+
+def schedule_filters(program: Optional[str] = None,
+                     year: Optional[int] = None,
+                     block: Optional[str] = None,
+                     day: Optional[str] = None,
+                     room: Optional[str] = None,
+                     faculty: Optional[str] = None):
+    return {"program": program, "year": year, "block": block, "day": day, "room": room, "faculty": faculty}
+
+
+def schedule_page(cursor: Optional[int] = Query(None, description="schedule_id of the last event already received"),
+                  limit: Optional[int] = Query(None, ge=1, le=5000),
+                  fmt: str = Query("json", alias="format", pattern="^(json|ndjson)$")):
+    return {"cursor": cursor, "limit": limit, "fmt": fmt}
+
+
+def _schedule_response(request: Request, filters, page):
+    """Serve a filtered page of the current schedule, or 304 if the client's copy is current.
+
+    The ETag changes with every schedule mutation and every room edit, since
+    the JSON body carries the rooms too. ``format=ndjson`` streams one event
+    per line, materializing NDJSON_CHUNK_SIZE events at a time.
+    """
+    rooms = load_rooms()
+    epoch, version = schedule_store.epoch, schedule_store.version
+    etag = f'"{epoch}-{version}-{rooms_cache.version}"'
+    if etag in [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    limit = page["limit"]
+    table, rows, total = schedule_store.select(after=page["cursor"], limit=None if limit is None else limit + 1,
+                                               **filters)
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = int(table.columns["schedule_id"][rows[-1]])
+
+    if page["fmt"] == "ndjson":
+        def lines():
+            for i in range(0, len(rows), NDJSON_CHUNK_SIZE):
+                yield "".join(json.dumps(event) + "\n" for event in table.row_dicts(rows[i:i + NDJSON_CHUNK_SIZE]))
+        headers = {"ETag": etag, "X-Event-Count": str(total)}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
+    # Events are plain JSON types already, so skip jsonable_encoder
+    return JSONResponse({
+        "status": "success",
+        "schedule": table.row_dicts(rows),
+        "event_count": total,
+        "next_cursor": next_cursor,
+        "epoch": epoch,
+        "version": version,
+        "rooms": rooms
+    }, headers={"ETag": etag})
+
 
 @router.get("/generate")
-async def get_schedule(background_tasks: BackgroundTasks,
+async def get_schedule(request: Request,
                        force: bool = False,
-                       progress: bool = True):
-    if schedule_dict and not force:
-        event_count = len(schedule_dict)
-        logger.info(f"Returning cached schedule ({event_count} events)")
-        return {
-            "status": "success",
-            "schedule": list(schedule_dict.values()),
-            "rooms": load_rooms(),
-            "event_count": event_count  # Add this to show the actual count in response
-        }
+                       progress: bool = True,
+                       compact_rooms: bool = False,
+                       hint: bool = False,
+                       decompose: bool = False,
+                       by_year: bool = False,
+                       optimize: bool = False,
+                       late_after: int = Query(DEFAULT_LATE_AFTER, ge=0, le=24),
+                       gap_weight: int = Query(DEFAULT_WEIGHTS["gaps"], ge=0),
+                       late_weight: int = Query(DEFAULT_WEIGHTS["late"], ge=0),
+                       balance_weight: int = Query(DEFAULT_WEIGHTS["day_balance"], ge=0),
+                       max_time: int = Query(60, ge=1, le=600),
+                       slot_minutes: Optional[int] = Query(None, ge=5, le=180,
+                                                           description="Time grid step; defaults to the time settings"),
+                       filters: dict = Depends(schedule_filters),
+                       page: dict = Depends(schedule_page)):
+    if schedule_store and not force:
+        logger.info(f"Returning cached schedule ({len(schedule_store)} events)")
+        return _schedule_response(request, filters, page)
+
+    options = {"compact_rooms": compact_rooms, "hint": hint, "decompose": decompose, "by_year": by_year,
+               "max_time": max_time}
+    if slot_minutes is not None:
+        # Coarser grids solve faster, finer ones allow more start times
+        options["slot_minutes"] = slot_minutes
+    if optimize:
+        # Improving solutions can be accepted early via /jobs/{id}/accept
+        options.update(optimize=True, late_after=late_after,
+                       weights={"gaps": gap_weight, "late": late_weight, "day_balance": balance_weight})
+    try:
+        job = submit_generation(**options)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    logger.info(f"Started schedule generation process_id={job['id']}")
+    return {"status": "started", "process_id": job["id"]}
+
+@router.post("/resolve")
+async def resolve_schedule(request: ResolveRequest, compact_rooms: bool = False):
+    """Re-solve only the given courses, keeping every other event in place"""
+    if not schedule_store:
+        raise HTTPException(status_code=400, detail="No schedule to re-solve; generate one first")
+
+    codes = set(request.added) | set(request.changed) | set(request.removed)
+    logger.info("Re-solving %d course(s): %s", len(codes), sorted(codes))
+    try:
+        job = submit_generation(compact_rooms=compact_rooms, changed_courses=codes)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    result = await job["done"]
+    if job["status"] == "superseded":
+        raise HTTPException(status_code=409, detail="The schedule changed while re-solving; nothing was applied")
+    if job["status"] == "timed_out":
+        raise HTTPException(status_code=409, detail="Re-solve timed out before finding a placement; nothing was applied")
+    if result is None:
+        message = f"Re-solve {job['status']}: changed courses cannot be placed around the current schedule"
+        if job["problems"]:
+            raise HTTPException(status_code=409, detail={"message": message, "problems": job["problems"]})
+        raise HTTPException(status_code=409, detail=message)
+
+    return {
+        "status": "success",
+        "schedule": result,
+        "event_count": len(result),
+        "rooms": load_rooms()
+    }
+
+@router.get("/changes")
+async def get_schedule_changes(since: int = Query(..., ge=0), epoch: Optional[str] = None):
+    """Event diffs since a schedule version; "refetch" means the history no longer covers it"""
+    changes = schedule_store.changes_since(since) if epoch in (None, schedule_store.epoch) else None
+    if changes is None:
+        return {"status": "refetch", "epoch": schedule_store.epoch, "version": schedule_store.version}
+    return {
+        "status": "success",
+        "epoch": schedule_store.epoch,
+        "version": schedule_store.version,
+        "changes": changes
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "job": job_info(job)}
+
+@router.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """Cancel a queued job or stop the solver of a running one"""
+    job = cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    logger.info("Cancelling schedule job %s", job_id)
+    return {"status": "success", "job": job_info(job)}
 
-    process_id = str(uuid.uuid4())
-    progress_state[process_id] = 0
+@router.get("/jobs/{job_id}/best")
+async def get_job_best(job_id: str):
+    """The best schedule an optimizing job has found so far"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["best"] is None:
+        raise HTTPException(status_code=404, detail="No solution found yet")
+    return {"status": "success", "job": job_info(job), "schedule": job["best"], "event_count": len(job["best"])}
 
-    background_tasks.add_task(generate_schedule, process_id)
-    logger.info(f"Started schedule generation process_id={process_id}")
-    return {"status": "started", "process_id": process_id}
+@router.post("/jobs/{job_id}/accept")
+async def accept_job_best(job_id: str):
+    """Apply the best schedule found so far and stop the search"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    if job["best"] is None:
+        raise HTTPException(status_code=409, detail="No solution found yet")
+    job = accept_job(job_id)
+    logger.info("Accepted best schedule of job %s", job_id)
+    return {"status": "success", "job": job_info(job), "event_count": len(schedule_store)}
 
 @router.get("/status/{process_id}")
 async def get_generation_status(process_id: str):
@@ -43,7 +206,7 @@ async def get_generation_status(process_id: str):
         return {
             "status": "complete",
             "progress": 100,
-            "event_count": len(schedule_dict)
+            "event_count": len(schedule_store)
         }
     elif progress == -1:
         return {
@@ -57,25 +220,21 @@ async def get_generation_status(process_id: str):
         }
 
 @router.get("/result")
-async def get_generated_schedule():
-    """Get the full generated schedule after completion"""
-    if not schedule_dict:
+async def get_generated_schedule(request: Request,
+                                 filters: dict = Depends(schedule_filters),
+                                 page: dict = Depends(schedule_page)):
+    """Get the generated schedule after completion, optionally filtered and paginated"""
+    if not schedule_store:
         raise HTTPException(status_code=404, detail="No schedule has been generated yet")
-    
-    all_events = list(schedule_dict.values())
-    return {
-        "status": "success",
-        "schedule": all_events,
-        "event_count": len(all_events),
-        "rooms": load_rooms()
-    }
+
+    return _schedule_response(request, filters, page)
 
 @router.post("/save")
 async def save_schedule(final_schedule: dict):
     try:
         name = final_schedule.get("schedule_name")
         logger.info("Saving schedule '%s'", name)
-        db.collection("final_schedules").document(name).set(final_schedule)
+        await run_db(db.collection("final_schedules").document(name).set, final_schedule)
         return {"status": "success", "message": f"Schedule '{name}' saved."}
     except Exception:
         logger.exception("Error saving schedule")
@@ -88,7 +247,7 @@ async def get_final_schedule(schedule_name: str):
     try:
         logger.info("GET /schedule/final/%s called", schedule_name)
         doc_ref = db.collection("final_schedules").document(schedule_name)
-        doc = doc_ref.get()
+        doc = await run_db(doc_ref.get)
         if not doc.exists:
             logger.error("Schedule '%s' not found", schedule_name)
             raise HTTPException(status_code=404, detail="Schedule not found")
@@ -108,8 +267,7 @@ async def list_final_schedules():
     try:
         logger.info("GET /schedule/final called to list schedules")
         schedules_ref = db.collection("final_schedules")
-        docs = schedules_ref.stream()
-        schedule_names = [doc.id for doc in docs]
+        schedule_names = await run_db(lambda: [doc.id for doc in schedules_ref.stream()])
         logger.info("Found %d Schedules", len(schedule_names))
         return {"status": "success", "schedules": schedule_names}
     except Exception as e:
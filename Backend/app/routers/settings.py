@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.core.auth import verify_token_allowed
 from app.core.firebase import (
-    db, load_rooms, load_days, refresh_rooms_cache,
-    refresh_days_cache, refresh_time_settings_cache
+    db, run_db, load_rooms, load_days, rooms_cache,
+    days_cache, time_settings_cache
 )
 from app.models.settings import RoomData, DaysSettings, TimeSettings
 import logging
@@ -31,10 +31,9 @@ async def get_days():
 @router.get("/get_time_settings")
 async def get_time_settings():
     try:
-        time_settings_doc = db.collection("settings").document("time").get()
-        if not time_settings_doc.exists:
+        time_settings = time_settings_cache.data()
+        if time_settings is None:
             raise HTTPException(status_code=404, detail="Time settings not found")
-        time_settings = time_settings_doc.to_dict()
         return {"status": "success", "time_settings": time_settings}
     except Exception as e:
         logger.exception("Error fetching time settings")
@@ -42,9 +41,12 @@ async def get_time_settings():
 
 @router.post("/add_rooms")
 async def add_rooms(room_data: RoomData):
+    """Update the fields sent; room windows and capacities are kept when omitted"""
     try:
-        refresh_rooms_cache()
-        db.collection("rooms").document("rooms").set(room_data.dict())
+        changes = room_data.dict(exclude_unset=True)
+        # Merging on the top-level fields replaces each map sent instead of deep-merging it
+        await run_db(db.collection("rooms").document("rooms").set, changes, merge=list(changes))
+        rooms_cache.set({**(rooms_cache.data() or {}), **changes})
         return {"status": "success", "message": "Rooms updated successfully."}
     except Exception as e:
         logger.exception("Error updating rooms")
@@ -52,9 +54,11 @@ async def add_rooms(room_data: RoomData):
 
 @router.post("/update_time_settings")
 async def update_time_settings(settings: TimeSettings):
+    """Update the fields sent; the slot and session lengths are kept when omitted"""
     try:
-        refresh_time_settings_cache()
-        db.collection("settings").document("time").set(settings.dict())
+        changes = settings.dict(exclude_unset=True)
+        await run_db(db.collection("settings").document("time").set, changes, merge=True)
+        time_settings_cache.set({**(time_settings_cache.data() or {}), **changes})
         return {"status": "success", "message": "Time settings updated successfully."}
     except Exception as e:
         logger.exception("Error updating time settings")
@@ -63,8 +67,8 @@ async def update_time_settings(settings: TimeSettings):
 @router.post("/update_days")
 async def update_days(days_settings: DaysSettings):
     try:
-        refresh_days_cache()
-        db.collection("settings").document("days").set(days_settings.dict())
+        await run_db(db.collection("settings").document("days").set, days_settings.dict())
+        days_cache.set(days_settings.dict())
         return {"status": "success", "message": "Days updated successfully."}
     except Exception as e:
         logger.exception("Error updating days")
@@ -6,17 +6,47 @@ def get_value(row, keys, default=None):
             return row[key]
     return default
 
+def get_start_end(period_str: str):
+    def parse_time(t: str) -> int:
+        time_part, meridiem = t.split(" ")
+        hour, minute = map(int, time_part.split("." if ":" not in time_part else ":"))
+        if meridiem.upper() == "PM" and hour != 12:
+            hour += 12
+        if meridiem.upper() == "AM" and hour == 12:
+            hour = 0
+        return hour * 60 + minute
+
+    start_str, end_str = period_str.split(" - ")
+    return parse_time(start_str), parse_time(end_str)
+
+def parse_clock(time_str: str) -> int:
+    """Minutes since midnight of an "HH:MM" (24-hour) time."""
+    hours, minutes = map(int, time_str.split(":"))
+    return hours * 60 + minutes
+
+def parse_window(window: dict):
+    """An unavailability window {"day", "start", "end"} as (day, start, end) minutes."""
+    return window["day"], parse_clock(window["start"]), parse_clock(window["end"])
+
+def window_overlaps(windows, day, start, end):
+    """First of ``windows`` overlapping ``start``-``end`` minutes on ``day``, or None."""
+    for window in windows or ():
+        w_day, w_start, w_end = parse_window(window)
+        if w_day == day and w_start < end and start < w_end:
+            return window
+    return None
+
+def format_clock(total_minutes: int) -> str:
+    """Minutes since midnight as a 12-hour clock time, e.g. 810 -> "1:30 PM"."""
+    hour = total_minutes // 60
+    minute = total_minutes % 60
+    suffix = "AM" if hour < 12 else "PM"
+    hour_12 = hour % 12
+    hour_12 = 12 if hour_12 == 0 else hour_12
+    return f"{hour_12}:{minute:02d} {suffix}"
+
 def format_period(new_start_str: str, duration_minutes: int) -> str:
-    hours, minutes = map(int, new_start_str.split(":"))
-    start_total = hours * 60 + minutes
-    end_total = start_total + duration_minutes 
-
-    def format_time(total_minutes):
-        hour = total_minutes // 60 
-        minute = total_minutes % 60 
-        suffix = "AM" if hour < 12 else "PM"
-        hour_12 = hour % 12
-        hour_12 = 12 if hour_12 == 0 else hour_12
-        return f"{hour_12}:{minute:02d} {suffix}"
-
-    return f"{format_time(start_total)} - {format_time(end_total)}"
+    start_total = parse_clock(new_start_str)
+    end_total = start_total + duration_minutes
+
+    return f"{format_clock(start_total)} - {format_clock(end_total)}"
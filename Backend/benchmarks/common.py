@@ -0,0 +1,45 @@
+"""Shared setup for the benchmark scripts; run them from Backend/ with ``python -m benchmarks.<name>``."""
+import argparse
+import os
+import random
+import sys
+from benchmarks import fake_firestore
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+TIME_SETTINGS = {"start_time": 7, "end_time": 21}
+
+
+def arguments(description, **options):
+    """Parse ``--root`` plus ``options`` ({name: default}) from the command line."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--root", default=os.getcwd(),
+                        help="Backend directory to benchmark, e.g. a git worktree of an older commit")
+    for name, default in options.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    return parser.parse_args()
+
+
+def use_tree(root, latency=0.0):
+    """Import ``app`` from ``root`` against the in-memory Firestore."""
+    fake_firestore.install()
+    fake_firestore.LATENCY = latency
+    sys.path.insert(0, os.path.abspath(root))
+    for name in [name for name in sys.modules if name == "app" or name.startswith("app.")]:
+        del sys.modules[name]
+
+
+def catalog(programs=4, years=4, per_year=6, blocks=3, lec_rooms=30, lab_rooms=10, seed=0):
+    """A synthetic course catalog and room list; the same seed gives the same catalog."""
+    rnd = random.Random(seed)
+    courses = [
+        {"courseCode": f"P{p}Y{y}C{c}", "title": f"Course {p}{y}{c}", "program": f"PROG{p}", "yearLevel": y,
+         "unitsLecture": rnd.choice([2, 3]), "unitsLab": rnd.choice([0, 1]), "blocks": blocks}
+        for p in range(programs) for y in range(1, years + 1) for c in range(per_year)
+    ]
+    rooms = {"lecture": [f"L{i}" for i in range(lec_rooms)], "lab": [f"LAB{i}" for i in range(lab_rooms)]}
+    return courses, rooms
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
@@ -0,0 +1,208 @@
+"""In-memory stand-in for the Firestore client, for benchmarks only.
+
+``install()`` registers fake ``firebase_admin`` modules, so ``app.core.firebase``
+imports without credentials and talks to ``STORE`` instead. Every
+round-trip (get, set, update, delete, stream, batch commit, get_all)
+sleeps ``LATENCY`` seconds to stand in for the network.
+"""
+import copy
+import sys
+import threading
+import time
+import types
+from types import SimpleNamespace
+
+LATENCY = 0.0
+STORE = {}
+_listeners = []
+_lock = threading.Lock()
+
+
+def _round_trip():
+    if LATENCY:
+        time.sleep(LATENCY)
+
+
+def _notify(collection, doc_id, kind):
+    for listener in list(_listeners):
+        listener(collection, doc_id, kind)
+
+
+class Snapshot:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+def _change(kind, snap):
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=snap)
+
+
+def _watch(match, callback, initial):
+    def listener(collection, doc_id, kind):
+        if match(collection, doc_id):
+            callback([], [_change(kind, Snapshot(DocumentReference(collection, doc_id),
+                                                 STORE.get(collection, {}).get(doc_id)))], None)
+    _listeners.append(listener)
+    callback([], initial, None)
+    return SimpleNamespace(unsubscribe=lambda: _listeners.remove(listener))
+
+
+class DocumentReference:
+    def __init__(self, collection, doc_id):
+        self.collection = collection
+        self.id = doc_id
+
+    def get(self):
+        _round_trip()
+        return Snapshot(self, STORE.get(self.collection, {}).get(self.id))
+
+    def set(self, data, merge=False):
+        _round_trip()
+        self._set(data, merge)
+
+    def update(self, data):
+        _round_trip()
+        self._update(data)
+
+    def delete(self):
+        _round_trip()
+        self._delete()
+
+    def _set(self, data, merge=False):
+        with _lock:
+            docs = STORE.setdefault(self.collection, {})
+            kind = "MODIFIED" if self.id in docs else "ADDED"
+            docs[self.id] = {**docs.get(self.id, {}), **copy.deepcopy(data)} if merge else copy.deepcopy(data)
+        _notify(self.collection, self.id, kind)
+
+    def _update(self, data):
+        with _lock:
+            docs = STORE.setdefault(self.collection, {})
+            if self.id not in docs:
+                raise KeyError(f"{self.collection}/{self.id} not found")
+            docs[self.id].update(copy.deepcopy(data))
+        _notify(self.collection, self.id, "MODIFIED")
+
+    def _delete(self):
+        with _lock:
+            removed = STORE.get(self.collection, {}).pop(self.id, None)
+        if removed is not None:
+            _notify(self.collection, self.id, "REMOVED")
+
+    def on_snapshot(self, callback):
+        data = STORE.get(self.collection, {}).get(self.id)
+        initial = [_change("ADDED", Snapshot(self, data))] if data is not None else []
+        return _watch(lambda c, d: (c, d) == (self.collection, self.id), callback, initial)
+
+
+class Query:
+    def __init__(self, collection, filters=(), count=None):
+        self.collection = collection
+        self.filters = filters
+        self.count = count
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, value = filter.field_path, filter.value
+        return Query(self.collection, self.filters + ((field_path, value),), self.count)
+
+    def limit(self, count):
+        return Query(self.collection, self.filters, count)
+
+    def stream(self):
+        _round_trip()
+        matches = [(doc_id, data) for doc_id, data in list(STORE.get(self.collection, {}).items())
+                   if all(data.get(field) == value for field, value in self.filters)]
+        for doc_id, data in matches[:self.count]:
+            yield Snapshot(DocumentReference(self.collection, doc_id), data)
+
+    def get(self):
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, name):
+        super().__init__(name)
+        self.id = name
+
+    def document(self, doc_id):
+        return DocumentReference(self.collection, doc_id)
+
+    def on_snapshot(self, callback):
+        initial = [_change("ADDED", Snapshot(DocumentReference(self.collection, doc_id), data))
+                   for doc_id, data in STORE.get(self.collection, {}).items()]
+        return _watch(lambda c, d: c == self.collection, callback, initial)
+
+
+class WriteBatch:
+    def __init__(self):
+        self._writes = []
+
+    def set(self, ref, data, merge=False):
+        self._writes.append(lambda: ref._set(data, merge))
+
+    def update(self, ref, data):
+        self._writes.append(lambda: ref._update(data))
+
+    def delete(self, ref):
+        self._writes.append(ref._delete)
+
+    def commit(self):
+        if len(self._writes) > 500:
+            raise ValueError("A batch holds at most 500 writes")
+        _round_trip()
+        for write in self._writes:
+            write()
+        self._writes = []
+
+
+class FieldFilter:
+    def __init__(self, field_path, op_string, value):
+        self.field_path, self.op_string, self.value = field_path, op_string, value
+
+
+class Client:
+    def collection(self, name):
+        return CollectionReference(name)
+
+    def batch(self):
+        return WriteBatch()
+
+    def get_all(self, refs):
+        _round_trip()
+        for ref in list(refs):
+            yield Snapshot(ref, STORE.get(ref.collection, {}).get(ref.id))
+
+
+def install():
+    """Make ``import firebase_admin`` resolve to this in-memory client.
+
+    Older trees import ``FieldFilter`` from google-cloud-firestore; it is
+    faked too when that package is missing.
+    """
+    credentials = types.ModuleType("firebase_admin.credentials")
+    credentials.Certificate = lambda path: None
+    firestore = types.ModuleType("firebase_admin.firestore")
+    firestore.client = Client
+    firestore.SERVER_TIMESTAMP = object()
+    firebase_admin = types.ModuleType("firebase_admin")
+    firebase_admin.initialize_app = lambda *args, **kwargs: None
+    firebase_admin.credentials = credentials
+    firebase_admin.firestore = firestore
+    sys.modules.update({
+        "firebase_admin": firebase_admin,
+        "firebase_admin.credentials": credentials,
+        "firebase_admin.firestore": firestore,
+    })
+    try:
+        import google.cloud.firestore_v1  # noqa: F401
+    except ImportError:
+        firestore_v1 = types.ModuleType("google.cloud.firestore_v1")
+        firestore_v1.FieldFilter = FieldFilter
+        sys.modules["google.cloud.firestore_v1"] = firestore_v1
@@ -0,0 +1,72 @@
+"""Load test for Firestore calls made from async routes.
+
+Fires ``--requests`` concurrent save/list/get calls at the /schedule routes
+while a probe keeps hitting a route that needs no Firestore, and reports
+throughput and the probe's latency. Each Firestore round-trip takes
+``--latency`` seconds. Compare trees with ``--root``:
+
+    python -m benchmarks.load_db
+    git worktree add /tmp/before <commit>~1
+    python -m benchmarks.load_db --root /tmp/before/Backend
+
+Needs httpx.
+"""
+import asyncio
+import time
+from benchmarks.common import arguments, use_tree, percentile
+from benchmarks import fake_firestore
+
+
+async def run(app, requests):
+    import httpx
+    probe_latency = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/schedule/jobs/none")
+                probe_latency.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        async def call(i):
+            if i % 3 == 0:
+                response = await client.post("/schedule/save", json={"schedule_name": f"N{i}"})
+            elif i % 3 == 1:
+                response = await client.get("/schedule/final")
+            else:
+                response = await client.get(f"/schedule/final/S{i % 20}")
+            assert response.status_code == 200, response.text
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(call(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    print(f"{requests} requests in {elapsed:.2f} s: {requests / elapsed:.0f} req/s; "
+          f"probe p50 {percentile(probe_latency, 0.5) * 1000:.0f} ms, max {max(probe_latency) * 1000:.0f} ms")
+
+
+def main():
+    args = arguments(__doc__.splitlines()[0], requests=200, latency=0.05)
+    use_tree(args.root, args.latency)
+    for i in range(20):
+        fake_firestore.STORE.setdefault("final_schedules", {})[f"S{i}"] = {"schedule_name": f"S{i}"}
+    from fastapi import FastAPI
+    from app.core.auth import verify_token_allowed
+    from app.core import firebase
+    from app.routers import schedule
+
+    if hasattr(firebase, "start_cache_listeners"):
+        firebase.start_cache_listeners()
+    app = FastAPI()
+    app.include_router(schedule.router, prefix="/schedule")
+    app.dependency_overrides[verify_token_allowed] = lambda: {"email": "bench"}
+    asyncio.run(run(app, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Load test for /auth/login.
+
+Seeds 20 admins with plaintext passwords (the first login of each one
+migrates it to a bcrypt hash where supported), then sends ``--logins``
+logins from ``--clients`` concurrent clients, one in four with a wrong
+password. Reports throughput, latency and the worst event-loop lag seen
+by a 5 ms timer:
+
+    python -m benchmarks.load_login [--root <Backend of another tree>]
+
+Needs httpx.
+"""
+import asyncio
+import logging
+import time
+from benchmarks.common import arguments, use_tree, percentile
+from benchmarks import fake_firestore
+
+ADMINS = 20
+
+
+async def run(app, logins, clients):
+    import httpx
+    lag = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag.append(time.perf_counter() - started - 0.005)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def login(i):
+            return await client.post("/auth/login", json={"email": f"admin{i % ADMINS}@example.com",
+                                                          "password": "secret" if i % 4 else "wrong"})
+
+        for i in range(ADMINS):
+            await login(i + 1)
+
+        slots = asyncio.Semaphore(clients)
+        latency = []
+
+        async def timed(i):
+            async with slots:
+                started = time.perf_counter()
+                response = await login(i)
+                latency.append(time.perf_counter() - started)
+                assert response.status_code == (200 if i % 4 else 401), response.status_code
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(timed(i) for i in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    print(f"{logins} logins from {clients} clients: {logins / elapsed:.1f}/s, "
+          f"p50 {percentile(latency, 0.5) * 1000:.0f} ms, p99 {percentile(latency, 0.99) * 1000:.0f} ms, "
+          f"max loop lag {max(lag) * 1000:.1f} ms")
+
+
+def main():
+    args = arguments(__doc__.splitlines()[0], logins=200, clients=20, latency=0.02)
+    use_tree(args.root, args.latency)
+    fake_firestore.STORE["admins"] = {f"a{i}": {"email": f"admin{i}@example.com", "password": "secret"}
+                                      for i in range(ADMINS)}
+    logging.disable(logging.CRITICAL)
+    from fastapi import FastAPI
+    from app.core import firebase
+    from app.routers import auth
+
+    if hasattr(firebase, "start_cache_listeners"):
+        firebase.start_cache_listeners()
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+    asyncio.run(run(app, args.logins, args.clients))
+
+
+if __name__ == "__main__":
+    main()
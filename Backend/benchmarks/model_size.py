@@ -0,0 +1,53 @@
+"""Model size and build time of the channeled vs the compact room formulation.
+
+Builds the CP-SAT model for two synthetic catalogs with each formulation
+and reports variables, constraints, build time and (single worker)
+solve time:
+
+    python -m benchmarks.model_size [--max-time 60]
+"""
+import time
+from benchmarks.common import arguments, use_tree, catalog, DAYS, TIME_SETTINGS
+
+SIZES = [
+    dict(programs=2, per_year=5),
+    dict(programs=4, per_year=6, lec_rooms=40, lab_rooms=12),
+]
+
+
+def main():
+    args = arguments(__doc__.splitlines()[0], max_time=60)
+    use_tree(args.root)
+    from ortools.sat.python import cp_model
+    from app.core.solver import build_and_solve
+
+    stats = {}
+    solve = cp_model.CpSolver.Solve
+
+    def measured_solve(solver, model, *rest, **kwargs):
+        stats["build"] = time.perf_counter() - stats["started"]
+        stats["variables"] = len(model.Proto().variables)
+        stats["constraints"] = len(model.Proto().constraints)
+        solver.parameters.num_search_workers = 1
+        started = time.perf_counter()
+        status = solve(solver, model, *rest, **kwargs)
+        stats["solve"] = time.perf_counter() - started
+        return status
+
+    cp_model.CpSolver.Solve = measured_solve
+    for size in SIZES:
+        courses, rooms = catalog(**size)
+        for compact in (False, True):
+            stats["started"] = time.perf_counter()
+            result = build_and_solve(courses, rooms, TIME_SETTINGS, DAYS, compact_rooms=compact,
+                                     max_time=args.max_time, num_workers=1)
+            # Older trees return the events alone, newer ones (events, status)
+            events = result[0] if isinstance(result, tuple) else result
+            print(f"{len(courses)} courses, {len(rooms['lecture'])}/{len(rooms['lab'])} rooms, "
+                  f"{'compact' if compact else 'channel'}: {stats['variables']} vars, "
+                  f"{stats['constraints']} constraints, build {stats['build']:.2f} s, "
+                  f"solve {stats['solve']:.2f} s, {len(events) if events else 'no'} events", flush=True)
+
+
+if __name__ == "__main__":
+    main()
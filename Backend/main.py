@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import sys
 from fastapi import FastAPI
@@ -5,15 +6,12 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers import auth, courses, faculty, schedule, excel, overrides, settings, progress
 from app.core.firebase import (
-    refresh_faculty_cache,
-    refresh_courses_cache,
-    refresh_rooms_cache,
-    refresh_time_settings_cache,
-    refresh_days_cache,
-    load_admins_cache,
-    get_start_end,
+    run_db,
+    start_cache_listeners,
+    stop_cache_listeners,
 )
-from app.core.globals import schedule_dict
+from app.core import jobs, loads, persistence
+from app.core.globals import schedule_store
 
 logging.basicConfig(
     level=logging.INFO,
@@ -54,18 +52,19 @@ async def root():
 
 @app.on_event("startup")
 async def startup_event():
-    refresh_faculty_cache()
-    refresh_courses_cache()
-    refresh_rooms_cache()
-    refresh_time_settings_cache()
-    refresh_days_cache()
-    load_admins_cache()
+    persistence.restore(schedule_store)
+    app.state.snapshot_task = asyncio.create_task(persistence.snapshot_periodically())
+    await run_db(start_cache_listeners)
+    loads.start()
 
-    for ev in schedule_dict.values():
-        if ev.get("period"):
-            start, end = get_start_end(ev["period"])
-            ev["start"] = start
-            ev["end"] = end
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    jobs.shutdown()
+    await loads.stop()
+    app.state.snapshot_task.cancel()
+    persistence.close()
+    stop_cache_listeners()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+from app.core.assignment import solve_assignment
+
+
+def group(code, assigned, *sessions):
+    return {"courseCode": code, "program": "BSIT", "block": "A", "title": code,
+            "sessions": list(sessions), "assigned": assigned}
+
+
+def test_kept_teacher_over_their_maximum_does_not_stop_balancing():
+    groups = [
+        group("IT101", "Kept", ("Monday", 420, 900), ("Tuesday", 420, 900)),
+        group("IT102", "", ("Wednesday", 420, 480)),
+        group("IT103", "", ("Thursday", 420, 480)),
+    ]
+    faculty = [{"name": "Kept", "max_units": 12}, {"name": "Ana", "max_units": 12},
+               {"name": "Ben", "max_units": 12}]
+
+    result = solve_assignment(groups, faculty, keep_existing=True, num_workers=1)
+
+    assert result["status"] == "OPTIMAL"
+    assert result["loads"] == {"Kept": 16.0, "Ana": 1.0, "Ben": 1.0}
+    assert result["unassigned"] == []
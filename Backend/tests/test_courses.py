@@ -0,0 +1,56 @@
+import asyncio
+import httpx
+import pytest
+from benchmarks import fake_firestore
+
+fake_firestore.install()
+from fastapi import FastAPI  # noqa: E402
+from app.core import firebase  # noqa: E402
+from app.core.auth import verify_token_allowed  # noqa: E402
+from app.routers import courses  # noqa: E402
+
+COURSE = {"courseCode": "IT101", "title": "Introduction to Computing", "program": "BSIT",
+          "unitsLecture": 2, "unitsLab": 1, "yearLevel": 1, "blocks": 4}
+
+
+@pytest.fixture
+def stored():
+    """IT101 in Firestore with an enrollment and session lengths."""
+    data = {**COURSE, "enrollment": 40, "blockEnrollment": {"A": 45}, "lectureMinutes": 80, "labMinutes": 120}
+    firebase.db.collection("courses").document("IT101").set(data)
+    yield data
+    firebase.db.collection("courses").document("IT101").delete()
+
+
+def call(method, url, payload):
+    app = FastAPI()
+    app.include_router(courses.router, prefix="/courses")
+    app.dependency_overrides[verify_token_allowed] = lambda: {"email": "test"}
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.request(method, url, json=payload)
+    response = asyncio.run(run())
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def saved(code):
+    return firebase.db.collection("courses").document(code).get().to_dict()
+
+
+def test_bulk_upsert_keeps_fields_it_leaves_out(stored):
+    result = call("POST", "/courses/bulk", {"upserts": [{**COURSE, "blocks": 3},
+                                                        {**COURSE, "courseCode": "IT102"}]})
+    assert result["updated"] == ["IT101"] and result["created"] == ["IT102"]
+    assert saved("IT101") == {**stored, "blocks": 3}
+    assert firebase.courses_cache.get("IT101") == {**stored, "blocks": 3}
+    assert saved("IT102")["enrollment"] is None
+    firebase.db.collection("courses").document("IT102").delete()
+
+
+def test_update_keeps_fields_it_leaves_out(stored):
+    call("PUT", "/courses/update/IT101", {**COURSE, "title": "Computing", "enrollment": 35})
+    expected = {**stored, "title": "Computing", "enrollment": 35}
+    assert saved("IT101") == expected
+    assert firebase.courses_cache.get("IT101") == expected
@@ -0,0 +1,18 @@
+import asyncio
+from benchmarks import fake_firestore
+
+fake_firestore.install()
+from app.core import loads  # noqa: E402
+
+
+def test_stop_right_after_start_drops_the_queued_write_back():
+    errors = []
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        loads.start()
+        await loads.stop()
+        await asyncio.sleep(0)
+    asyncio.run(run())
+    assert errors == []
+    assert loads._timer is None and not loads._pending
@@ -0,0 +1,68 @@
+import random
+import pytest
+from app.core import persistence
+from app.core.store import ScheduleStore
+from tests.test_store import random_event, random_edits
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "SNAPSHOT_PATH", str(tmp_path / "schedule.snapshot"))
+    monkeypatch.setattr(persistence, "CHANGELOG_PATH", str(tmp_path / "schedule.changelog"))
+    yield tmp_path
+    persistence.close()
+    persistence._store = None
+
+
+def crash():
+    """Stop logging the way a killed process would: no final snapshot."""
+    persistence._log.close()
+    persistence._log = None
+
+
+def by_id(store):
+    return sorted(store.values(), key=lambda ev: ev["schedule_id"])
+
+
+def test_snapshot_and_change_log_restore_exactly(files):
+    rnd = random.Random(11)
+    store = ScheduleStore()
+    persistence.restore(store)
+    store.replace([random_event(rnd, sid) for sid in range(1, 80)])
+    random_edits(store, rnd, 120)
+    store.update(next(iter(store)), {"note": "moved by hand"})
+    persistence.snapshot()
+    random_edits(store, rnd, 120)
+    expected = by_id(store)
+    crash()
+    assert (files / "schedule.changelog").stat().st_size > 0
+
+    restored = ScheduleStore()
+    assert persistence.restore(restored) == len(expected)
+    assert by_id(restored) == expected
+    assert restored.faculty_loads() == pytest.approx(store.faculty_loads())
+
+
+def test_torn_log_tail_is_ignored(files):
+    rnd = random.Random(12)
+    store = ScheduleStore()
+    persistence.restore(store)
+    store.replace([random_event(rnd, sid) for sid in range(1, 20)])
+    random_edits(store, rnd, 30)
+    expected = by_id(store)
+    crash()
+    with open(persistence.CHANGELOG_PATH, "ab") as log:
+        log.write(b"\x93\x01")
+
+    restored = ScheduleStore()
+    persistence.restore(restored)
+    assert by_id(restored) == expected
+
+    # Changes logged after the torn record survive the next restart too
+    random_edits(restored, rnd, 30)
+    restored.update(next(iter(restored)), {"note": "after the first restart"})
+    expected = by_id(restored)
+    crash()
+    again = ScheduleStore()
+    persistence.restore(again)
+    assert by_id(again) == expected
@@ -0,0 +1,43 @@
+import asyncio
+import httpx
+from benchmarks import fake_firestore
+
+fake_firestore.install()
+from fastapi import FastAPI  # noqa: E402
+from app.core import firebase  # noqa: E402
+from app.core.auth import verify_token_allowed  # noqa: E402
+from app.core.globals import schedule_store  # noqa: E402
+from app.routers import schedule  # noqa: E402
+
+EVENT = {"schedule_id": 1, "courseCode": "IT101", "title": "Computing", "program": "BSIT", "year": 1,
+         "session": "Lecture", "block": "A", "day": "Monday", "period": "7:00 AM - 8:00 AM",
+         "room": "R1", "start": 420, "end": 480}
+
+
+def get(url, **headers):
+    app = FastAPI()
+    app.include_router(schedule.router, prefix="/schedule")
+    app.dependency_overrides[verify_token_allowed] = lambda: {"email": "test"}
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(url, headers=headers)
+    return asyncio.run(run())
+
+
+def test_room_edit_changes_the_schedule_etag():
+    rooms = firebase.db.collection("rooms").document("rooms")
+    rooms.set({"lecture": ["R1"], "lab": []})
+    schedule_store.replace([EVENT])
+    try:
+        first = get("/schedule/result")
+        assert first.status_code == 200
+        assert get("/schedule/result", **{"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+        rooms.set({"lecture": ["R1", "R2"], "lab": []})
+        again = get("/schedule/result", **{"If-None-Match": first.headers["ETag"]})
+        assert again.status_code == 200
+        assert again.json()["rooms"]["lecture"] == ["R1", "R2"]
+    finally:
+        schedule_store.replace([])
+        rooms.delete()
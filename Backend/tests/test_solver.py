@@ -0,0 +1,26 @@
+from app.core.solver import solve_schedule
+
+TIME_SETTINGS = {"start_time": 7, "end_time": 12, "lecture_minutes": 60}
+
+
+def test_blocks_of_different_sizes_are_not_ordered_by_start():
+    # Block A only fits the big room, which is free 10:00-11:00; block B then
+    # has to take the small room before 9:00, i.e. start before block A.
+    course = {"courseCode": "IT101", "title": "Computing", "program": "BSIT", "yearLevel": 1,
+              "unitsLecture": 1, "unitsLab": 0, "blocks": 2, "blockEnrollment": {"A": 50, "B": 20}}
+    rooms = {
+        "lecture": ["Small", "Big"],
+        "lab": [],
+        "capacity": {"Small": 30, "Big": 60},
+        "unavailable": {
+            "Small": [{"day": "Monday", "start": "9:00", "end": "12:00"}],
+            "Big": [{"day": "Monday", "start": "7:00", "end": "10:00"},
+                    {"day": "Monday", "start": "11:00", "end": "12:00"}],
+        },
+    }
+
+    events = solve_schedule([course], rooms, TIME_SETTINGS, ["Monday"], max_time=10)
+
+    placed = {ev["block"]: (ev["room"], ev["start"]) for ev in events}
+    assert placed == {"A": ("Big", 10 * 60), "B": ("Small", placed["B"][1])}
+    assert placed["B"][1] < 9 * 60
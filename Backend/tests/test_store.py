@@ -0,0 +1,126 @@
+import random
+import pytest
+from app.core.store import ScheduleStore
+from app.utils.helper import format_clock
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+ROOMS = ["R1", "R2", "R3", "LAB1"]
+FACULTY = ["", "Ana", "Ben", "Cruz"]
+
+
+def random_event(rnd, schedule_id):
+    start = rnd.randrange(7 * 60, 19 * 60, 15)
+    end = start + rnd.choice([50, 60, 90, 120])
+    event = {
+        "schedule_id": schedule_id,
+        "courseCode": f"C{rnd.randrange(6)}",
+        "title": "Course",
+        "program": rnd.choice(["BSIT", "BSCS"]),
+        "year": rnd.randrange(1, 3),
+        "session": rnd.choice(["Lecture", "Laboratory"]),
+        "block": rnd.choice("AB"),
+        "day": rnd.choice(DAYS),
+        "period": f"{format_clock(start)} - {format_clock(end)}",
+        "room": rnd.choice(ROOMS),
+    }
+    faculty = rnd.choice(FACULTY)
+    if faculty:
+        event["faculty"] = faculty
+    return event
+
+
+def random_edits(store, rnd, count):
+    """Add, move, reassign and remove events at random."""
+    next_id = max(store, default=0) + 1
+    for _ in range(count):
+        op = rnd.random()
+        if op < 0.4 or not store:
+            store.add(random_event(rnd, next_id))
+            next_id += 1
+        elif op < 0.8:
+            changed = random_event(rnd, 0)
+            fields = {name: changed[name] for name in rnd.sample(["period", "room", "day", "faculty"], 2)
+                      if name in changed}
+            store.update(rnd.choice(list(store)), fields)
+        else:
+            store.remove(rnd.choice(list(store)))
+
+
+def overlapping(events, day, start, end, **match):
+    return sorted(ev["schedule_id"] for ev in events
+                  if ev["day"] == day and ev["start"] < end and start < ev["end"]
+                  and all(ev.get(name) == value for name, value in match.items()))
+
+
+def ids(events):
+    return sorted(ev["schedule_id"] for ev in events)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_overlap_queries_match_brute_force(seed):
+    rnd = random.Random(seed)
+    store = ScheduleStore()
+    store.replace([random_event(rnd, sid) for sid in range(1, 150)])
+    random_edits(store, rnd, 300)
+
+    events = store.values()
+    for _ in range(200):
+        day = rnd.choice(DAYS)
+        start = rnd.randrange(7 * 60, 21 * 60)
+        end = start + rnd.randrange(1, 180)
+        room, faculty = rnd.choice(ROOMS), rnd.choice(FACULTY[1:])
+        program, year, block = rnd.choice(["BSIT", "BSCS"]), rnd.randrange(1, 3), rnd.choice("AB")
+        assert ids(store.room_overlaps(room, day, start, end)) == overlapping(events, day, start, end, room=room)
+        assert (ids(store.faculty_overlaps(faculty, day, start, end))
+                == overlapping(events, day, start, end, faculty=faculty))
+        assert (ids(store.section_overlaps(program, year, block, day, start, end))
+                == overlapping(events, day, start, end, program=program, year=year, block=block))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_faculty_loads_match_brute_force(seed):
+    rnd = random.Random(seed)
+    store = ScheduleStore()
+    store.replace([random_event(rnd, sid) for sid in range(1, 100)])
+    random_edits(store, rnd, 300)
+
+    expected = {}
+    for ev in store.values():
+        if ev.get("faculty"):
+            expected[ev["faculty"]] = expected.get(ev["faculty"], 0) + (ev["end"] - ev["start"]) / 60
+    assert store.faculty_loads() == pytest.approx(expected)
+
+
+def test_group_and_select_match_brute_force():
+    rnd = random.Random(7)
+    store = ScheduleStore()
+    store.replace([random_event(rnd, sid) for sid in range(1, 120)])
+    random_edits(store, rnd, 100)
+
+    events = store.values()
+    for code in {ev["courseCode"] for ev in events}:
+        expected = [ev["schedule_id"] for ev in events
+                    if (ev["courseCode"], ev["program"], ev["block"]) == (code, "BSIT", "A")]
+        assert ids(store.group(code, "BSIT", "A")) == sorted(expected)
+    table, rows, total = store.select(day="Monday", room="R1")
+    expected = sorted(ev["schedule_id"] for ev in events if ev["day"] == "Monday" and ev["room"] == "R1")
+    assert total == len(expected)
+    assert ids(table.row_dicts(rows)) == expected
+
+
+def test_changes_since_replays_to_the_same_schedule():
+    rnd = random.Random(3)
+    store = ScheduleStore()
+    store.replace([random_event(rnd, sid) for sid in range(1, 50)])
+    since, mirror = store.version, {ev["schedule_id"]: ev for ev in store.values()}
+    random_edits(store, rnd, 60)
+
+    for change in store.changes_since(since):
+        if change["op"] == "upsert":
+            mirror[change["event"]["schedule_id"]] = change["event"]
+        else:
+            mirror.pop(change["schedule_id"], None)
+    assert sorted(mirror.values(), key=lambda ev: ev["schedule_id"]) == sorted(store.values(),
+                                                                                key=lambda ev: ev["schedule_id"])
+    store.replace([])
+    assert store.changes_since(since) is None